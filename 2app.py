@@ -1,8 +1,12 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from web3 import Web3
 import streamlit.components.v1 as components
+from chain import ChainClient, infura_url
+from downsample import Rollups
+from query import METRICS, asset_type_means, farm_rows, score_cells, selection
+from scoring import score_farm
+from storage import ensure_dataset, load, partition_values
+from stream import READINGS_FILE, SensorPipeline
 import json
 
 # === CONFIG ===
@@ -10,36 +14,48 @@ st.set_page_config(page_title="Asset-Based Credit Score", layout="wide")
 st.title("🌾 Asset-Based Credit Scoring Demo")
 
 # === Smart Contract Configuration ===
-INFURA_URL = f"https://sepolia.infura.io/v3/{st.secrets['INFURA_KEY']}"
-CONTRACT_ADDRESS = "0xfb3fc9218cb7c555b144f36390cde4c93aa8cbd6"
-ABI = [
-    {"inputs": [{"internalType": "address", "name": "_borrower", "type": "address"},
-                {"internalType": "uint256", "name": "_yieldThreshold", "type": "uint256"}],
-     "stateMutability": "payable", "type": "constructor"},
-    {"inputs": [], "name": "amount", "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
-     "stateMutability": "view", "type": "function"},
-    {"inputs": [], "name": "borrower", "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-     "stateMutability": "view", "type": "function"},
-    {"inputs": [], "name": "disbursed", "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
-     "stateMutability": "view", "type": "function"},
-    {"inputs": [], "name": "getStatus", "outputs": [{"internalType": "string", "name": "", "type": "string"}],
-     "stateMutability": "view", "type": "function"},
-    {"inputs": [], "name": "lender", "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-     "stateMutability": "view", "type": "function"},
-    {"inputs": [{"internalType": "uint256", "name": "actualYield", "type": "uint256"}],
-     "name": "releaseFunds", "outputs": [],
-     "stateMutability": "nonpayable", "type": "function"},
-    {"inputs": [], "name": "yieldThreshold", "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
-     "stateMutability": "view", "type": "function"}
-]
+@st.cache_resource
+def get_chain_client():
+    return ChainClient(infura_url(st.secrets["INFURA_KEY"]))
+
 
 try:
-    w3 = Web3(Web3.HTTPProvider(INFURA_URL))
-    contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=ABI)
+    contract = get_chain_client().ensure_connected()
 except Exception as e:
     contract = None
     st.error("❌ Web3 initialization failed: " + str(e))
 
+
+# === Sensor Data ===
+# Keyed on the dataset version like the trend charts: when the sensor CSV changes the
+# pipeline is reseeded, and the evicted one's threads are stopped.
+@st.cache_resource(max_entries=1, on_release=SensorPipeline.stop)
+def get_sensor_pipeline(version):
+    pipeline = SensorPipeline()
+    for reading in load("sensors").sort_values("date").to_dict("records"):
+        pipeline.ingest(reading)
+    return pipeline.start(READINGS_FILE)
+
+
+@st.cache_resource(max_entries=2)
+def sensor_rollups(version):
+    return Rollups(load("sensors").sort_values("date").set_index("date"))
+
+
+# === Federated Charts ===
+@st.cache_resource(max_entries=64)
+def yield_vs_score_chart(version, regions, asset_types):
+    cells = score_cells(version, regions, asset_types)
+    return px.scatter(cells, x="yield_prediction", y="credit_score", color="region", size="farms",
+                      hover_data=["asset_type", "score_bucket", "yield_prediction_min", "yield_prediction_max"])
+
+
+@st.cache_resource(max_entries=64)
+def asset_type_chart(version, regions, asset_types):
+    grouped = asset_type_means(version, regions, asset_types)
+    return px.bar(grouped, x="asset_type", y=METRICS, barmode="group")
+
+
 wallet_address = st.text_input("Wallet Address", key="wallet_address")
 if st.checkbox("👁️ Show Wallet Address") and wallet_address:
     st.success(f"Connected Wallet: `{wallet_address}`")
@@ -48,20 +64,22 @@ if st.checkbox("👁️ Show Wallet Address") and wallet_address:
 mode = st.radio("Select Mode:", ["Simulate", "MetaMask (On-chain)"])
 
 # === Data Setup ===
-data = pd.read_csv("cassava_farm_data.csv")
+sensor_version = ensure_dataset("sensors")
+sensor_history = sensor_rollups(sensor_version)
 
 # === Tab Layout ===
 tab1, tab2 = st.tabs(["📈 Farm Monitoring & Disbursement", "🌍 Federated Comparison"])
 
 with tab1:
     st.subheader("📊 Farm Sensor Data Trends")
-    st.line_chart(data.set_index("date")[["soil_moisture", "temperature"]])
+    st.line_chart(sensor_history.view(["soil_moisture", "temperature"]))
 
     st.subheader("🌾 Yield Predictions")
-    st.bar_chart(data.set_index("date")["yield_prediction"])
+    st.bar_chart(sensor_history.view(["yield_prediction"])["yield_prediction"])
 
-    avg_yield = int(data["yield_prediction"].mean())
-    credit_score = min(100, max(30, int(avg_yield / 20)))
+    farm_stats = get_sensor_pipeline(sensor_version).aggregates()
+    avg_yield = int(farm_stats["yield_prediction"]["mean"])
+    credit_score = score_farm(avg_yield, farm_stats["soil_moisture"]["mean"], farm_stats["temperature"]["mean"], "Cassava")
     st.markdown(f"### 📊 Projected Credit Score: **{credit_score}** / 100")
 
     consent = st.checkbox("✅ I agree to share my farm data with the lender.")
@@ -129,19 +147,25 @@ with tab1:
 with tab2:
     st.header("🌍 Federated Farm Comparison")
     try:
-        df = pd.read_csv("federated_farm_data.csv")
         st.sidebar.header("🔍 Filter Farms")
-        regions = st.sidebar.multiselect("Select Region(s):", options=df["region"].unique(), default=df["region"].unique())
-        asset_types = st.sidebar.multiselect("Select Asset Type(s):", options=df["asset_type"].unique(), default=df["asset_type"].unique())
-        filtered_df = df[(df["region"].isin(regions)) & (df["asset_type"].isin(asset_types))]
+        region_options = partition_values("federated", "region")
+        asset_type_options = partition_values("federated", "asset_type")
+        regions = st.sidebar.multiselect("Select Region(s):", options=region_options, default=region_options)
+        asset_types = st.sidebar.multiselect("Select Asset Type(s):", options=asset_type_options, default=asset_type_options)
+        version = ensure_dataset("federated")
+        query_key = (version, selection(regions), selection(asset_types))
         st.subheader("📋 Filtered Farms Overview")
-        st.dataframe(filtered_df)
+        # Charts come from the summary cube; raw rows are only read for the table.
+        if st.toggle("Show farm table"):
+            st.dataframe(farm_rows(*query_key), column_config={
+                "soil_moisture": st.column_config.NumberColumn(format="%.1f"),
+                "temperature": st.column_config.NumberColumn(format="%.1f"),
+            })
         st.subheader("📊 Yield Prediction vs Credit Score")
-        fig1 = px.scatter(filtered_df, x="yield_prediction", y="credit_score", color="region", size="soil_moisture", hover_data=["farm_id", "asset_type"])
+        fig1 = yield_vs_score_chart(*query_key)
         st.plotly_chart(fig1, use_container_width=True)
         st.subheader("🌾 Average Metrics by Asset Type")
-        grouped = filtered_df.groupby("asset_type")[["soil_moisture", "temperature", "yield_prediction", "credit_score"]].mean().reset_index()
-        fig2 = px.bar(grouped, x="asset_type", y=["soil_moisture", "temperature", "yield_prediction", "credit_score"], barmode="group")
+        fig2 = asset_type_chart(*query_key)
         st.plotly_chart(fig2, use_container_width=True)
     except Exception as e:
         st.error("Failed to load or process federated data: " + str(e))
@@ -1,43 +1,85 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from web3 import Web3
-import streamlit.components.v1 as components
+from downsample import Rollups
+from metrics import end_run, start_run, timer
+from query import METRICS, asset_type_means, farm_rows, score_cells, selection
+from scoring import SIMULATED_THRESHOLD, meets_threshold, score_farm
+from storage import ensure_dataset, load, partition_values
+from stream import READINGS_FILE, SensorPipeline
+
+# web3 (chain, indexer) and plotly are imported where they are first needed, so a
+# session that never opens MetaMask mode or the federated tab doesn't load them.
 
 # === CONFIG ===
 st.set_page_config(page_title="Asset-Based Credit Score", layout="wide")
 st.title("🌾 Asset-Based Credit Scoring Demo")
 
+# === Instrumentation ===
+# Stage timings are exported only when APP_METRICS=1; ?debug=1 times just this
+# session's rerun and shows the panel.
+debug = st.query_params.get("debug") == "1"
+start_run(debug)
+
 # === Smart Contract Configuration ===
-INFURA_URL = f"https://sepolia.infura.io/v3/{st.secrets['INFURA_KEY']}"
-CONTRACT_ADDRESS = "0xfb3fc9218cb7c555b144f36390cde4c93aa8cbd6"
-ABI = [
-    {"inputs": [{"internalType": "address", "name": "_borrower", "type": "address"},
-                {"internalType": "uint256", "name": "_yieldThreshold", "type": "uint256"}],
-     "stateMutability": "payable", "type": "constructor"},
-    {"inputs": [], "name": "amount", "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
-     "stateMutability": "view", "type": "function"},
-    {"inputs": [], "name": "borrower", "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-     "stateMutability": "view", "type": "function"},
-    {"inputs": [], "name": "disbursed", "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
-     "stateMutability": "view", "type": "function"},
-    {"inputs": [], "name": "getStatus", "outputs": [{"internalType": "string", "name": "", "type": "string"}],
-     "stateMutability": "view", "type": "function"},
-    {"inputs": [], "name": "lender", "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-     "stateMutability": "view", "type": "function"},
-    {"inputs": [{"internalType": "uint256", "name": "actualYield", "type": "uint256"}],
-     "name": "releaseFunds", "outputs": [],
-     "stateMutability": "nonpayable", "type": "function"},
-    {"inputs": [], "name": "yieldThreshold", "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
-     "stateMutability": "view", "type": "function"}
-]
-
-try:
-    w3 = Web3(Web3.HTTPProvider(INFURA_URL))
-    contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=ABI)
-except Exception as e:
-    contract = None
-    st.error("❌ Web3 initialization failed: " + str(e))
+@st.cache_resource
+def get_chain_client():
+    from chain import ChainClient, infura_url
+    return ChainClient(infura_url(st.secrets["INFURA_KEY"]))
+
+
+def get_contract():
+    try:
+        return get_chain_client().ensure_connected()
+    except Exception as e:
+        st.error("❌ Web3 initialization failed: " + str(e))
+        return None
+
+
+# === Scoring Service ===
+@st.cache_resource
+def get_service():
+    url = st.secrets.get("SCORING_SERVICE_URL")
+    if not url:
+        return None
+    from service_client import ServiceClient
+    return ServiceClient(url)
+
+
+service = get_service()
+
+
+# === Sensor Data ===
+# Keyed on the dataset version like the trend charts: when the sensor CSV changes the
+# pipeline is reseeded, and the evicted one's threads are stopped.
+@st.cache_resource(max_entries=1, on_release=SensorPipeline.stop)
+def get_sensor_pipeline(version):
+    pipeline = SensorPipeline()
+    for reading in load("sensors").sort_values("date").to_dict("records"):
+        pipeline.ingest(reading)
+    return pipeline.start(READINGS_FILE)
+
+
+@st.cache_resource(max_entries=2)
+def sensor_rollups(version):
+    return Rollups(load("sensors").sort_values("date").set_index("date"))
+
+
+# === Federated Charts ===
+@st.cache_resource(max_entries=64)
+def yield_vs_score_chart(version, regions, asset_types):
+    import plotly.express as px
+    cells = score_cells(version, regions, asset_types)
+    with timer("plotly_build:scatter"):
+        return px.scatter(cells, x="yield_prediction", y="credit_score", color="region", size="farms",
+                          hover_data=["asset_type", "score_bucket", "yield_prediction_min", "yield_prediction_max"])
+
+
+@st.cache_resource(max_entries=64)
+def asset_type_chart(version, regions, asset_types):
+    import plotly.express as px
+    grouped = asset_type_means(version, regions, asset_types)
+    with timer("plotly_build:bar"):
+        return px.bar(grouped, x="asset_type", y=METRICS, barmode="group")
+
 
 wallet_address = st.text_input("Wallet Address", key="wallet_address")
 if st.checkbox("👁️ Show Wallet Address") and wallet_address:
@@ -47,78 +89,114 @@ if st.checkbox("👁️ Show Wallet Address") and wallet_address:
 mode = st.radio("Select Mode:", ["Simulate", "MetaMask (On-chain)"])
 
 # === Data Setup ===
-data = pd.read_csv("cassava_farm_data.csv")
-threshold = 1500  # fixed threshold
+threshold = SIMULATED_THRESHOLD  # MetaMask mode reads yieldThreshold on-chain
 
 # === Tab Layout ===
-tab1, tab2 = st.tabs(["📈 Farm Monitoring & Disbursement", "🌍 Federated Comparison"])
+# on_change="rerun" makes tabs lazy: only the open tab's body runs.
+tab1, tab2 = st.tabs(["📈 Farm Monitoring & Disbursement", "🌍 Federated Comparison"], key="tab", on_change="rerun")
 
 with tab1:
-    st.subheader("📊 Farm Sensor Data Trends")
-    st.line_chart(data.set_index("date")[["soil_moisture", "temperature"]])
-
-    st.subheader("🌾 Yield Predictions")
-    st.bar_chart(data.set_index("date")["yield_prediction"])
-
-    avg_yield = int(data["yield_prediction"].mean())
-    credit_score = min(100, max(30, int(avg_yield / 20)))
-    st.markdown(f"### 📊 Projected Credit Score: **{credit_score}** / 100")
-
-    consent = st.checkbox("✅ I agree to share my farm data with the lender.")
-
-    if consent:
-        st.success("Consent recorded. Logic unlocked.")
-        st.info(f"Threshold: {threshold}, Predicted Yield: {avg_yield}")
-
-        if mode == "Simulate":
-            if avg_yield >= threshold:
-                st.success("✅ Conditions met. Funds would be released in a real scenario.")
-            else:
-                st.warning("⚠️ Yield does not meet threshold. No funds released.")
-
-        elif mode == "MetaMask (On-chain)":
-            if avg_yield >= threshold:
-                st.success("✅ Conditions met. Click below to trigger on-chain release.")
+    if tab1.open:
+        sensor_version = ensure_dataset("sensors")
+        sensor_history = sensor_rollups(sensor_version)
+        st.subheader("📊 Farm Sensor Data Trends")
+        with timer("sensor_chart:line"):
+            st.line_chart(sensor_history.view(["soil_moisture", "temperature"]))
+
+        st.subheader("🌾 Yield Predictions")
+        with timer("sensor_chart:bar"):
+            st.bar_chart(sensor_history.view(["yield_prediction"])["yield_prediction"])
+
+        farm_stats = get_sensor_pipeline(sensor_version).aggregates()
+        avg_yield = int(farm_stats["yield_prediction"]["mean"])
+        farm = {"yield_prediction": avg_yield, "soil_moisture": farm_stats["soil_moisture"]["mean"],
+                "temperature": farm_stats["temperature"]["mean"], "asset_type": "Cassava"}
+        credit_score = service.score([farm])[0] if service else score_farm(**farm)
+        st.markdown(f"### 📊 Projected Credit Score: **{credit_score}** / 100")
+
+        consent = st.checkbox("✅ I agree to share my farm data with the lender.")
+
+        if consent:
+            st.success("Consent recorded. Logic unlocked.")
+
+            if mode == "MetaMask (On-chain)" and (service or get_contract()):
+                try:
+                    from chain import CONTRACT_ADDRESS
+                    from indexer import indexed_state
+                    state = indexed_state(CONTRACT_ADDRESS)
+                    if state is None:
+                        state = service.contract_state() if service else get_chain_client().snapshot()
+                    threshold = state["yieldThreshold"]
+                    st.markdown("🧾 Smart Contract Status: " + str(state["getStatus"]))
+                    st.caption(f"Contract state as of block {state['block']}")
+                except Exception as e:
+                    st.error("Status fetch failed: " + str(e))
+
+            st.info(f"Threshold: {threshold}, Predicted Yield: {avg_yield}")
+
+            if mode == "Simulate":
+                if meets_threshold(avg_yield, threshold):
+                    st.success("✅ Conditions met. Funds would be released in a real scenario.")
+                else:
+                    st.warning("⚠️ Yield does not meet threshold. No funds released.")
+
+            elif mode == "MetaMask (On-chain)":
+                if meets_threshold(avg_yield, threshold):
+                    st.success("✅ Conditions met. Click below to trigger on-chain release.")
 
                 
-                redirect_url = f"https://debm.pythonanywhere.com/trigger?yield={avg_yield}"
-
-                st.markdown(f"""
-                    <a href="{redirect_url}" target="_self" style="
-                        display: inline-block;
-                        padding: 10px 20px;
-                        background-color: #2081e2;
-                        color: white;
-                        border-radius: 6px;
-                        text-decoration: none;
-                        font-weight: bold;
-                        font-size: 16px;
-                    ">
-                    🌐 Trigger MetaMask Transaction
-                    </a>
-                """, unsafe_allow_html=True)
-            else:
-                st.warning("⚠️ Yield does not meet threshold. No on-chain release.")
+                    redirect_url = f"https://debm.pythonanywhere.com/trigger?yield={avg_yield}"
+
+                    st.markdown(f"""
+                        <a href="{redirect_url}" target="_self" style="
+                            display: inline-block;
+                            padding: 10px 20px;
+                            background-color: #2081e2;
+                            color: white;
+                            border-radius: 6px;
+                            text-decoration: none;
+                            font-weight: bold;
+                            font-size: 16px;
+                        ">
+                        🌐 Trigger MetaMask Transaction
+                        </a>
+                    """, unsafe_allow_html=True)
+                else:
+                    st.warning("⚠️ Yield does not meet threshold. No on-chain release.")
 
 with tab2:
-    st.header("🌍 Federated Farm Comparison")
-    try:
-        df = pd.read_csv("federated_farm_data.csv")
-        st.sidebar.header("🔍 Filter Farms")
-        regions = st.sidebar.multiselect("Select Region(s):", options=df["region"].unique(), default=df["region"].unique())
-        asset_types = st.sidebar.multiselect("Select Asset Type(s):", options=df["asset_type"].unique(), default=df["asset_type"].unique())
-        filtered_df = df[(df["region"].isin(regions)) & (df["asset_type"].isin(asset_types))]
-        st.subheader("📋 Filtered Farms Overview")
-        st.dataframe(filtered_df)
-        st.subheader("📊 Yield Prediction vs Credit Score")
-        fig1 = px.scatter(filtered_df, x="yield_prediction", y="credit_score", color="region", size="soil_moisture", hover_data=["farm_id", "asset_type"])
-        st.plotly_chart(fig1, use_container_width=True)
-        st.subheader("🌾 Average Metrics by Asset Type")
-        grouped = filtered_df.groupby("asset_type")[["soil_moisture", "temperature", "yield_prediction", "credit_score"]].mean().reset_index()
-        fig2 = px.bar(grouped, x="asset_type", y=["soil_moisture", "temperature", "yield_prediction", "credit_score"], barmode="group")
-        st.plotly_chart(fig2, use_container_width=True)
-    except Exception as e:
-        st.error("❌ Failed to load or process federated data: " + str(e))
+    if tab2.open:
+        st.header("🌍 Federated Farm Comparison")
+        try:
+            st.sidebar.header("🔍 Filter Farms")
+            region_options = partition_values("federated", "region")
+            asset_type_options = partition_values("federated", "asset_type")
+            regions = st.sidebar.multiselect("Select Region(s):", options=region_options, default=region_options)
+            asset_types = st.sidebar.multiselect("Select Asset Type(s):", options=asset_type_options, default=asset_type_options)
+            version = ensure_dataset("federated")
+            query_key = (version, selection(regions), selection(asset_types))
+            st.subheader("📋 Filtered Farms Overview")
+            # Charts come from the summary cube; raw rows are only read for the table.
+            if st.toggle("Show farm table"):
+                st.dataframe(farm_rows(*query_key), column_config={
+                    "soil_moisture": st.column_config.NumberColumn(format="%.1f"),
+                    "temperature": st.column_config.NumberColumn(format="%.1f"),
+                })
+            st.subheader("📊 Yield Prediction vs Credit Score")
+            fig1 = yield_vs_score_chart(*query_key)
+            with timer("plotly_render:scatter"):
+                st.plotly_chart(fig1, use_container_width=True)
+            st.subheader("🌾 Average Metrics by Asset Type")
+            fig2 = asset_type_chart(*query_key)
+            with timer("plotly_render:bar"):
+                st.plotly_chart(fig2, use_container_width=True)
+        except Exception as e:
+            st.error("❌ Failed to load or process federated data: " + str(e))
 
 st.markdown("---")
 st.caption("Prototype demo for G20 TechSprint 2025 | Built by Alis Grave Nil")
+
+stages = end_run()
+if debug:
+    with st.sidebar.expander("⏱️ Rerun Timings", expanded=True):
+        st.dataframe([{"stage": stage, "ms": round(seconds * 1000, 1)} for stage, seconds in stages])
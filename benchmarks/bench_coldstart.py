@@ -0,0 +1,72 @@
+"""Cold-start benchmark for app.py.
+
+Runs the default view (Simulate mode, first tab) in a fresh interpreter and
+fails if that loads the on-chain or plotting stack, or if it takes longer
+than the budget:
+
+    python benchmarks/bench_coldstart.py [--budget SECONDS] [--runs N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+COLD_START_BUDGET = 4.0  # seconds from interpreter start to the first rendered page
+LAZY_MODULES = ["web3", "eth_abi", "plotly.express", "aiohttp"]
+
+CHILD = """
+import json, logging, sys, time
+start = time.perf_counter()
+logging.disable(logging.WARNING)
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=60)
+app.secrets["INFURA_KEY"] = "cold-start-benchmark"
+app.run()
+done = time.perf_counter()
+print(json.dumps({
+    "streamlit_import_s": imported - start,
+    "first_run_s": done - imported,
+    "total_s": done - start,
+    "exceptions": [e.value for e in app.exception],
+    "lazy_modules_loaded": [m for m in sys.argv[2:] if m in sys.modules],
+}))
+"""
+
+
+def measure():
+    out = subprocess.run([sys.executable, "-c", CHILD, os.path.join(ROOT, "app.py"), *LAZY_MODULES],
+                         cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=COLD_START_BUDGET)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    import storage
+    os.chdir(ROOT)
+    for name in storage.DATASETS:
+        storage.ensure_dataset(name)  # dataset builds are a deploy-time cost, not a cold-start one
+
+    runs = [measure() for _ in range(args.runs)]
+    best = min(runs, key=lambda r: r["total_s"])
+    failures = []
+    if best["exceptions"]:
+        failures.append("app raised: " + "; ".join(map(str, best["exceptions"])))
+    if best["lazy_modules_loaded"]:
+        failures.append("default view loaded " + ", ".join(best["lazy_modules_loaded"]))
+    if best["total_s"] > args.budget:
+        failures.append(f"cold start {best['total_s']:.2f}s exceeds budget {args.budget:.2f}s")
+    print(json.dumps({"budget_s": args.budget, "best": best, "runs": runs, "failures": failures}, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Benchmarks for the dashboard's hot paths, emitted as JSON.
+
+Generates synthetic tables shaped like cassava_farm_data.csv and
+federated_farm_data.csv and times CSV load, the tab1 mean/score, the tab2
+filter + groupby, batch scoring and contract view reads against a local mock
+JSON-RPC endpoint. Next to those baselines it times what the dashboard runs:
+the Parquet and memory-mapped compact loads with pushdown filters (``storage``)
+and the tab2 re-aggregation from the summary cube (``cube``):
+
+    python benchmarks/bench_suite.py [--sizes 1000,1000000,10000000] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import storage  # noqa: E402
+from cube import DIMENSIONS, SummaryCube, scored_farms  # noqa: E402
+from scoring import score_batch, score_farm  # noqa: E402
+
+SIZES = [1_000, 1_000_000, 10_000_000]
+REGIONS = ["West Africa", "East Africa", "Central Africa", "Southern Africa"]
+ASSET_TYPES = ["Cassava", "Maize", "Sorghum"]
+METRICS = ["soil_moisture", "temperature", "yield_prediction", "credit_score"]
+SEED = 2025
+
+
+def sensor_frame(rows, rng):
+    return pd.DataFrame({
+        "date": pd.date_range("2025-06-01", periods=rows, freq="min").strftime("%Y-%m-%d %H:%M"),
+        "soil_moisture": rng.normal(32, 1.5, rows).round(1),
+        "temperature": rng.normal(29, 1.2, rows).round(1),
+        "yield_prediction": rng.normal(1520, 90, rows).round().astype(np.int64),
+    })
+
+
+def federated_frame(rows, rng):
+    df = pd.DataFrame({
+        "farm_id": "FARM" + pd.Series(np.arange(1, rows + 1)).astype(str),
+        "region": rng.choice(REGIONS, rows),
+        "asset_type": rng.choice(ASSET_TYPES, rows),
+        "soil_moisture": rng.normal(31, 2, rows).round(1),
+        "temperature": rng.normal(29.5, 1.5, rows).round(1),
+        "yield_prediction": rng.normal(1460, 160, rows).round().astype(np.int64),
+    })
+    df["credit_score"] = score_batch(df)
+    return df
+
+
+def generate(data_dir, rows):
+    """Write (or reuse) the synthetic CSVs for ``rows`` and return their paths."""
+    paths = {name: os.path.join(data_dir, f"{name}_{rows}.csv") for name in ("sensors", "federated")}
+    rng = np.random.default_rng(SEED)
+    for name, build in (("sensors", sensor_frame), ("federated", federated_frame)):
+        if not os.path.exists(paths[name]):
+            build(rows, rng).to_csv(paths[name], index=False)
+    return paths
+
+
+def timed(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+class MockRPCSession:
+    """requests.Session stand-in that answers eth_blockNumber and the loan contract's view calls."""
+
+    def __init__(self):
+        from eth_abi import encode
+
+        from chain import selector
+        self.posts = 0
+        self.results = {
+            selector("amount"): encode(["uint256"], [10 ** 17]),
+            selector("borrower"): encode(["address"], ["0x" + "11" * 20]),
+            selector("disbursed"): encode(["bool"], [False]),
+            selector("getStatus"): encode(["string"], ["Awaiting yield report"]),
+            selector("lender"): encode(["address"], ["0x" + "22" * 20]),
+            selector("yieldThreshold"): encode(["uint256"], [1500]),
+        }
+
+    def post(self, url, json=None, timeout=None):
+        self.posts += 1
+        replies = [{"jsonrpc": "2.0", "id": r["id"],
+                    "result": hex(self.posts) if r["method"] == "eth_blockNumber"
+                    else "0x" + self.results[r["params"][0]["data"]].hex()} for r in json]
+        return _MockResponse(replies)
+
+    def close(self):
+        pass
+
+
+class _MockResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def bench_contract_reads(repeat, reads=200):
+    from chain import ChainClient
+    client = ChainClient("http://127.0.0.1:8545")
+    client.session = MockRPCSession()
+    seconds, _ = timed(lambda: [client.snapshot(ttl=0) for _ in range(reads)], repeat)
+    cached, _ = timed(lambda: [client.snapshot() for _ in range(reads)], repeat)
+    return {"snapshot_uncached_s": seconds / reads, "snapshot_cached_s": cached / reads}
+
+
+def bench_size(paths, rows, repeat):
+    results = {"rows": rows}
+    results["csv_load_sensors_s"], data = timed(lambda: pd.read_csv(paths["sensors"]), repeat)
+    results["csv_load_federated_s"], df = timed(lambda: pd.read_csv(paths["federated"]), repeat)
+
+    def tab1():
+        avg_yield = int(data["yield_prediction"].mean())
+        return score_farm(avg_yield, data["soil_moisture"].mean(), data["temperature"].mean(), "Cassava")
+    results["tab1_mean_score_s"], _ = timed(tab1, repeat)
+
+    regions, asset_types = REGIONS[:2], ASSET_TYPES[:2]
+
+    def tab2():
+        filtered = df[df["region"].isin(regions) & df["asset_type"].isin(asset_types)]
+        return filtered.groupby("asset_type")[METRICS].mean().reset_index()
+    results["tab2_filter_groupby_s"], _ = timed(tab2, repeat)
+    results["score_batch_s"], _ = timed(lambda: score_batch(df), repeat)
+    results.update(bench_dashboard(paths, rows, repeat, regions, asset_types))
+    return results
+
+
+def bench_dashboard(paths, rows, repeat, regions, asset_types):
+    """The storage and cube paths the dashboard reads through, over the same synthetic CSVs."""
+    storage.DATA_DIR = os.path.join(os.path.dirname(paths["federated"]), f"data_{rows}")
+    for name in ("sensors", "federated"):
+        storage.DATASETS[name]["source"] = paths[name]
+    results = {}
+    filters = {"region": regions, "asset_type": asset_types}
+    start = time.perf_counter()
+    for name in ("sensors", "federated"):
+        storage.ensure_dataset(name)
+    storage.ensure_compact("federated")
+    results["parquet_compact_build_s"] = time.perf_counter() - start
+
+    results["parquet_load_sensors_s"], _ = timed(lambda: storage.load("sensors"), repeat)
+    results["parquet_load_federated_filtered_s"], _ = timed(lambda: storage.load("federated", filters=filters),
+                                                            repeat)
+    results["compact_load_federated_filtered_s"], _ = timed(
+        lambda: storage.load_compact("federated", filters=filters), repeat)
+
+    results["cube_build_s"], cube = timed(lambda: SummaryCube.from_frame(scored_farms()), repeat)
+    results["cube_asset_type_means_s"], _ = timed(lambda: cube.means_by(["asset_type"], regions, asset_types),
+                                                  repeat)
+    results["cube_score_cells_s"], _ = timed(lambda: cube.means_by(DIMENSIONS, regions, asset_types), repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "credit-asset-bench"))
+    parser.add_argument("--output", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "sizes": [bench_size(generate(args.data_dir, int(n)), int(n), args.repeat) for n in args.sizes.split(",")],
+        "contract_reads": bench_contract_reads(args.repeat),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
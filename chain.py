@@ -0,0 +1,185 @@
+import threading
+import time
+
+import requests
+from eth_abi import decode
+from hexbytes import HexBytes
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+from metrics import timer
+
+# === Smart Contract Configuration ===
+INFURA_URL_TEMPLATE = "https://sepolia.infura.io/v3/{key}"
+CONTRACT_ADDRESS = "0xfb3fc9218cb7c555b144f36390cde4c93aa8cbd6"
+ABI = [
+    {"inputs": [{"internalType": "address", "name": "_borrower", "type": "address"},
+                {"internalType": "uint256", "name": "_yieldThreshold", "type": "uint256"}],
+     "stateMutability": "payable", "type": "constructor"},
+    {"inputs": [], "name": "amount", "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+     "stateMutability": "view", "type": "function"},
+    {"inputs": [], "name": "borrower", "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+     "stateMutability": "view", "type": "function"},
+    {"inputs": [], "name": "disbursed", "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
+     "stateMutability": "view", "type": "function"},
+    {"inputs": [], "name": "getStatus", "outputs": [{"internalType": "string", "name": "", "type": "string"}],
+     "stateMutability": "view", "type": "function"},
+    {"inputs": [], "name": "lender", "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+     "stateMutability": "view", "type": "function"},
+    {"inputs": [{"internalType": "uint256", "name": "actualYield", "type": "uint256"}],
+     "name": "releaseFunds", "outputs": [],
+     "stateMutability": "nonpayable", "type": "function"},
+    {"inputs": [], "name": "yieldThreshold", "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+     "stateMutability": "view", "type": "function"}
+]
+
+# === Connection Settings ===
+POOL_SIZE = 10
+REQUEST_TIMEOUT = 10  # seconds per RPC request
+HEALTH_CHECK_INTERVAL = 30  # seconds between liveness probes
+SNAPSHOT_TTL = 12  # seconds; roughly one Sepolia block
+
+
+def infura_url(key):
+    return INFURA_URL_TEMPLATE.format(key=key)
+
+
+def view_functions(abi=ABI):
+    return [item for item in abi
+            if item.get("type") == "function" and item.get("stateMutability") in ("view", "pure")
+            and not item["inputs"]]
+
+
+def selector(name):
+    return "0x" + bytes(Web3.keccak(text=name + "()")[:4]).hex()
+
+
+def view_calls(address, block="latest", abi=ABI):
+    """JSON-RPC ``eth_call`` requests for every argument-less view function in ``abi``."""
+    return [("eth_call", [{"to": address, "data": selector(fn["name"])}, block]) for fn in view_functions(abi)]
+
+
+def decode_views(results, abi=ABI):
+    state = {}
+    for fn, raw in zip(view_functions(abi), results):
+        types = [out["type"] for out in fn["outputs"]]
+        value = decode(types, HexBytes(raw))[0]
+        if types[0] == "address":
+            value = Web3.to_checksum_address(value)
+        state[fn["name"]] = value
+    return state
+
+
+def batch_payload(calls, start_id=0):
+    return [{"jsonrpc": "2.0", "id": start_id + i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)]
+
+
+def _rpc_error(error):
+    return RuntimeError("RPC error: " + str(error.get("message", error) if isinstance(error, dict) else error))
+
+
+def batch_results(replies, count, start_id=0):
+    """Results of a ``batch_payload`` of ``count`` calls, in request order.
+
+    Raises ``RuntimeError`` for any errored or missing reply, and when the node
+    rejects the whole batch with a single error object instead of a list.
+    """
+    if isinstance(replies, dict):
+        raise _rpc_error(replies.get("error", "unexpected reply to batch request"))
+    by_id = {reply.get("id"): reply for reply in replies if isinstance(reply, dict)}
+    results = []
+    for request_id in range(start_id, start_id + count):
+        reply = by_id.get(request_id)
+        if reply is None:
+            raise _rpc_error(by_id.get(None, {}).get("error", f"no reply for request {request_id}"))
+        if "error" in reply:
+            raise _rpc_error(reply["error"])
+        results.append(reply["result"])
+    return results
+
+
+class ChainClient:
+    """One pooled HTTP session and one parsed contract, shared by every rerun and session.
+
+    Build it once per process (the Streamlit app wraps it in ``st.cache_resource``)
+    and call ``ensure_connected()`` before use; it probes the node at most every
+    ``HEALTH_CHECK_INTERVAL`` seconds, healthy or not, and rebuilds the session
+    if the probe fails.
+    """
+
+    def __init__(self, rpc_url, address=CONTRACT_ADDRESS, abi=ABI, pool_size=POOL_SIZE, timeout=REQUEST_TIMEOUT):
+        self.rpc_url = rpc_url
+        self.address = Web3.to_checksum_address(address)
+        self.abi = abi
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = None
+        self._lock = threading.Lock()
+        self._last_probe = None
+        self._snapshots = {}
+        self.connect()
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def connect(self):
+        with self._lock:
+            old_session = self.session
+            self.session = self._new_session()
+            self.w3 = Web3(Web3.HTTPProvider(self.rpc_url, request_kwargs={"timeout": self.timeout},
+                                             session=self.session))
+            self.contract = self.w3.eth.contract(address=self.address, abi=self.abi)
+            if old_session is not None:
+                old_session.close()
+
+    def is_healthy(self):
+        try:
+            return self.w3.is_connected()
+        except Exception:
+            return False
+
+    def ensure_connected(self):
+        # A failed probe also counts, so a node that is down (or hangs until the
+        # timeout) costs one probe per interval rather than one per rerun.
+        now = time.monotonic()
+        if self._last_probe is not None and now - self._last_probe < HEALTH_CHECK_INTERVAL:
+            return self.contract
+        self._last_probe = now
+        if not self.is_healthy():
+            self.connect()
+        return self.contract
+
+    def rpc_batch(self, calls):
+        """Send ``[(method, params), ...]`` as one JSON-RPC batch and return the results in order."""
+        with timer("rpc:" + (calls[0][0] if len(calls) == 1 else "batch")):
+            response = self.session.post(self.rpc_url, json=batch_payload(calls), timeout=self.timeout)
+            response.raise_for_status()
+            return batch_results(response.json(), len(calls))
+
+    def snapshot(self, address=None, ttl=SNAPSHOT_TTL):
+        """All view state of ``address`` plus the block it was read at, in one round trip.
+
+        Results are reused for ``ttl`` seconds; after that a single batch re-reads
+        the block number and every view function, and the cached snapshot is only
+        replaced when the chain has moved to a new block.
+        """
+        address = Web3.to_checksum_address(address or self.address)
+        cached = self._snapshots.get(address)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        # Calls run against "latest", which can advance while the batch is in
+        # flight; the reported block is the one the node saw first.
+        results = self.rpc_batch([("eth_blockNumber", [])] + view_calls(address, abi=self.abi))
+        block = int(results[0], 16)
+        if cached and cached[1]["block"] >= block:
+            state = cached[1]
+        else:
+            state = decode_views(results[1:], self.abi)
+            state["block"] = block
+        self._snapshots[address] = (time.monotonic(), state)
+        return state
@@ -0,0 +1,138 @@
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+import storage
+from scoring import score_batch
+
+# === Summary Cube Layout ===
+DIMENSIONS = ["region", "asset_type", "score_bucket"]
+METRICS = ["soil_moisture", "temperature", "yield_prediction", "credit_score"]
+SCORE_BUCKET = 10  # credit-score points per bucket
+AGGREGATES = {"count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+
+def cube_path(name):
+    return os.path.join(storage.DATA_DIR, name + "_cube.parquet")
+
+
+def _cells(farms):
+    farms = farms.assign(score_bucket=(farms["credit_score"] // SCORE_BUCKET * SCORE_BUCKET).astype(np.int64))
+    for dim in ("region", "asset_type"):
+        farms[dim] = farms[dim].astype(str)
+    grouped = farms.groupby(DIMENSIONS)
+    parts = [grouped.size().rename("farms")]
+    for how in AGGREGATES:
+        parts.append(grouped[METRICS].agg(how).add_suffix("_" + how))
+    return pd.concat(parts, axis=1)
+
+
+class SummaryCube:
+    """Farm count plus count/sum/min/max of every metric per region × asset_type × score bucket.
+
+    The cube has one row per occupied cell, so charts built from it cost the
+    same however many farms there are. ``add()``/``remove()``/``rescore()``
+    fold changes in without touching other farms; a removal that takes out a
+    cell's extreme value marks that cell stale until ``refresh()`` recomputes
+    its min/max from the cell's raw rows.
+    """
+
+    def __init__(self, cells=None):
+        self.cells = cells if cells is not None else _cells(pd.DataFrame(columns=["region", "asset_type"] + METRICS))
+        self.stale = set()
+
+    @classmethod
+    def from_frame(cls, farms):
+        return cls(_cells(farms))
+
+    def add(self, farms):
+        if len(farms):
+            combined = pd.concat([self.cells, _cells(farms)])
+            self.cells = combined.groupby(level=DIMENSIONS).agg(self._merge_rules())
+
+    def remove(self, farms):
+        if not len(farms):
+            return
+        removed = _cells(farms).reindex(self.cells.index)
+        for how in ("count", "sum"):
+            cols = [f"{m}_{how}" for m in METRICS]
+            self.cells[cols] = self.cells[cols] - removed[cols].fillna(0).to_numpy()
+        self.cells["farms"] -= removed["farms"].fillna(0).astype(np.int64)
+        mins, maxes = [m + "_min" for m in METRICS], [m + "_max" for m in METRICS]
+        hits_min = removed[mins].to_numpy(dtype=float) <= self.cells[mins].to_numpy(dtype=float)
+        hits_max = removed[maxes].to_numpy(dtype=float) >= self.cells[maxes].to_numpy(dtype=float)
+        self.stale.update(self.cells.index[(hits_min | hits_max).any(axis=1)])
+        self.cells = self.cells[self.cells["farms"] > 0]
+        self.stale &= set(self.cells.index)
+
+    def rescore(self, old_rows, new_rows):
+        self.remove(old_rows)
+        self.add(new_rows)
+
+    def refresh(self, farms):
+        """Recompute min/max of stale cells from ``farms`` (the current raw rows)."""
+        if not self.stale:
+            return
+        keys = sorted(self.stale)
+        pairs = pd.MultiIndex.from_tuples([key[:2] for key in keys])
+        farms = farms[pd.MultiIndex.from_arrays([farms["region"].astype(str), farms["asset_type"].astype(str)]).isin(pairs)]
+        fresh = _cells(farms)
+        cols = [f"{m}_{how}" for how in ("min", "max") for m in METRICS]
+        self.cells.loc[keys, cols] = fresh.loc[keys, cols].to_numpy()
+        self.stale.clear()
+
+    @staticmethod
+    def _merge_rules():
+        rules = {"farms": "sum"}
+        rules.update({f"{m}_{how}": agg for how, agg in AGGREGATES.items() for m in METRICS})
+        return rules
+
+    def select(self, regions, asset_types):
+        cells = self.cells.reset_index()
+        return cells[cells["region"].isin(regions) & cells["asset_type"].isin(asset_types)]
+
+    def means_by(self, dims, regions, asset_types):
+        """Mean of every metric per ``dims`` over the selected cells, plus farm count and extremes."""
+        totals = self.select(regions, asset_types).groupby(dims).agg(self._merge_rules())
+        means = totals[[m + "_sum" for m in METRICS]].to_numpy() / totals[[m + "_count" for m in METRICS]].to_numpy()
+        extremes = totals[["farms"] + [f"{m}_{how}" for m in METRICS for how in ("min", "max")]]
+        return extremes.assign(**dict(zip(METRICS, means.T))).reset_index()
+
+    def save(self, path, version):
+        # Every dashboard process and predict.write_back may save; readers must never see a partial file.
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            self.cells.reset_index().assign(source_version=version).to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path, version):
+        """The cube saved for ``version``, or None if the file is missing or from another version."""
+        try:
+            cells = pd.read_parquet(path)
+        except (OSError, ValueError):
+            return None
+        if cells.empty or cells["source_version"].iloc[0] != version:
+            return None
+        return cls(cells.drop(columns="source_version").set_index(DIMENSIONS))
+
+
+def scored_farms(name="federated"):
+    farms = storage.load_compact(name, columns=["region", "asset_type"] + METRICS[:-1])
+    farms["credit_score"] = score_batch(farms)
+    return farms
+
+
+def cube_for(version, name="federated"):
+    """The saved cube for this dataset version, building and saving it from raw rows if needed."""
+    cube = SummaryCube.load(cube_path(name), version)
+    if cube is None:
+        cube = SummaryCube.from_frame(scored_farms(name))
+        cube.save(cube_path(name), version)
+    return cube
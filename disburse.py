@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
+
+import pandas as pd
+from web3 import Web3
+
+from chain import ABI, ChainClient, infura_url
+from scoring import meets_threshold
+from sweep import sweep
+
+# === Disbursement Settings ===
+GAS_LIMIT = 120_000  # releaseFunds transfers the escrow once; avoids an estimate round trip per farm
+PRIORITY_FEE_GWEI = 2
+RECEIPT_POLL_INTERVAL = 2  # seconds
+RECEIPT_TIMEOUT = 300  # seconds
+
+
+def eligible_farms(farms, states):
+    """Farms whose contract is readable, not yet disbursed and whose yield meets its ``yieldThreshold``.
+
+    ``farms`` holds dicts with ``farm_id``, ``contract`` and ``yield_prediction``;
+    ``states`` maps checksum contract addresses to view state, as ``sweep()`` returns.
+    """
+    selected = []
+    for farm in farms:
+        state = states.get(Web3.to_checksum_address(farm["contract"]), {})
+        if "error" in state or state.get("disbursed", True):
+            continue
+        if meets_threshold(int(farm["yield_prediction"]), state["yieldThreshold"]):
+            selected.append(farm)
+    return selected
+
+
+class DisbursementQueue:
+    """Signs releaseFunds transactions from one lender key and sends them without waiting on receipts.
+
+    Nonces are read once from the pending pool and then assigned locally, so a
+    whole batch can be broadcast back to back. If a send is rejected, the
+    remaining farms are re-signed from a freshly read nonce so no gap is left.
+    """
+
+    def __init__(self, w3, private_key, abi=ABI, gas_limit=GAS_LIMIT):
+        self.w3 = w3
+        self.account = w3.eth.account.from_key(private_key)
+        self.abi = abi
+        self.gas_limit = gas_limit
+        self._lock = threading.Lock()
+        self._nonce = None
+
+    def _next_nonce(self):
+        if self._nonce is None:
+            self._nonce = self.w3.eth.get_transaction_count(self.account.address, "pending")
+        nonce, self._nonce = self._nonce, self._nonce + 1
+        return nonce
+
+    def _fees(self):
+        base_fee = self.w3.eth.get_block("latest").get("baseFeePerGas")
+        if base_fee is None:
+            return {"gasPrice": self.w3.eth.gas_price}
+        priority = Web3.to_wei(PRIORITY_FEE_GWEI, "gwei")
+        return {"maxFeePerGas": 2 * base_fee + priority, "maxPriorityFeePerGas": priority}
+
+    def _sign(self, farm, nonce, fees, chain_id):
+        contract = self.w3.eth.contract(address=Web3.to_checksum_address(farm["contract"]), abi=self.abi)
+        tx = contract.functions.releaseFunds(int(farm["yield_prediction"])).build_transaction({
+            "from": self.account.address, "nonce": nonce, "gas": self.gas_limit, "chainId": chain_id, **fees})
+        signed = self.account.sign_transaction(tx)
+        return getattr(signed, "raw_transaction", None) or signed.rawTransaction
+
+    def submit(self, farms):
+        """Sign and broadcast one releaseFunds per farm; returns one result dict per farm."""
+        with self._lock:
+            fees, chain_id = self._fees(), self.w3.eth.chain_id
+            results, pending = [], list(farms)
+            resynced = False
+            while pending:
+                farm = pending.pop(0)
+                nonce = self._next_nonce()
+                result = {"farm_id": farm.get("farm_id"), "contract": farm["contract"], "nonce": nonce}
+                try:
+                    result["tx_hash"] = self.w3.eth.send_raw_transaction(self._sign(farm, nonce, fees, chain_id)).to_0x_hex()
+                    result["status"] = "pending"
+                except Exception as e:
+                    result.update(status="send_error", error=str(e), nonce=None)
+                    self._nonce = None  # re-read so the next farm doesn't leave a gap
+                    if not resynced:
+                        resynced = True
+                        pending.insert(0, farm)
+                        continue
+                results.append(result)
+                resynced = False
+            return results
+
+    async def track(self, results, poll_interval=RECEIPT_POLL_INTERVAL, timeout=RECEIPT_TIMEOUT):
+        """Fill in ``status``/``block`` for every pending result as receipts arrive."""
+        waiting = {r["tx_hash"]: r for r in results if r.get("status") == "pending"}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while waiting and loop.time() < deadline:
+            receipts = await asyncio.gather(*(asyncio.to_thread(self._receipt, h) for h in waiting))
+            for tx_hash, receipt in zip(list(waiting), receipts):
+                if receipt is not None:
+                    result = waiting.pop(tx_hash)
+                    result.update(status="confirmed" if receipt["status"] == 1 else "reverted",
+                                  block=receipt["blockNumber"], gas_used=receipt["gasUsed"])
+            if waiting:
+                await asyncio.sleep(poll_interval)
+        for result in waiting.values():
+            result["status"] = "timeout"
+        return results
+
+    def _receipt(self, tx_hash):
+        try:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        except Exception:
+            return None
+
+
+async def disburse(farms, rpc_url, private_key):
+    """Sweep every farm's contract, then release funds for the eligible ones and wait for receipts."""
+    states = (await sweep({f["contract"] for f in farms}, rpc_url=rpc_url))["contracts"]
+    queue = DisbursementQueue(ChainClient(rpc_url).w3, private_key)
+    results = queue.submit(eligible_farms(farms, states))
+    return await queue.track(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Release funds for every farm whose yield meets its contract threshold")
+    parser.add_argument("farms_csv", help="CSV with farm_id, contract and yield_prediction columns")
+    parser.add_argument("--rpc-url", default=None, help="defaults to Infura Sepolia via $INFURA_KEY")
+    args = parser.parse_args()
+    farms = pd.read_csv(args.farms_csv).to_dict("records")
+    rpc_url = args.rpc_url or infura_url(os.environ["INFURA_KEY"])
+    print(json.dumps(asyncio.run(disburse(farms, rpc_url, os.environ["LENDER_PRIVATE_KEY"])), indent=2))
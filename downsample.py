@@ -0,0 +1,64 @@
+import numpy as np
+
+# === Chart Resolution ===
+MAX_POINTS = 600  # points per series sent to the browser; about one per pixel column
+ROLLUP_FACTOR = 4  # rows merged per bucket from one rollup level to the next
+OVERSAMPLE = 4  # a level may hold this many times MAX_POINTS before LTTB trims it
+
+
+def lttb(y, n):
+    """Indices of ``n`` points chosen by Largest-Triangle-Three-Buckets over evenly spaced ``y``."""
+    size = len(y)
+    if n >= size or n < 3:
+        return np.arange(size)
+    x = np.arange(size, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    selected = np.empty(n, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    prev = 0
+    for i in range(n - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = stop, edges[i + 2] if i + 2 < n - 1 else size
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        areas = np.abs((x[prev] - avg_x) * (y[start:stop] - y[prev]) - (x[prev] - x[start:stop]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(areas))
+        selected[i + 1] = prev
+    return selected
+
+
+def downsample(frame, n=MAX_POINTS):
+    """Keep at most about ``n`` rows per column of ``frame``, preserving each column's visual shape."""
+    if len(frame) <= n:
+        return frame
+    keep = set()
+    for column in frame.columns:
+        keep.update(lttb(frame[column].to_numpy(), n).tolist())
+    return frame.iloc[sorted(keep)]
+
+
+class Rollups:
+    """Bucketed means of a time-indexed frame at resolutions 1, 4, 16, ... rows per point.
+
+    Built once per dataset version; ``view()`` picks the finest level that is
+    small enough and trims it with LTTB, so each render costs about the chart
+    width rather than the history length.
+    """
+
+    def __init__(self, frame, factor=ROLLUP_FACTOR, max_points=MAX_POINTS):
+        self.max_points = max_points
+        self.levels = [frame]
+        while len(self.levels[-1]) > max_points:
+            level = self.levels[-1]
+            buckets = np.arange(len(level)) // factor
+            coarser = level.groupby(buckets).mean(numeric_only=True)
+            coarser.index = level.index[::factor]
+            self.levels.append(coarser)
+
+    def view(self, columns, n=None):
+        n = n or self.max_points
+        for level in self.levels:
+            if len(level) <= n * OVERSAMPLE:
+                return downsample(level[columns], n)
+        return downsample(self.levels[-1][columns], n)
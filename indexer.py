@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from eth_abi import decode
+from hexbytes import HexBytes
+from web3 import Web3
+
+from chain import CONTRACT_ADDRESS, ChainClient, decode_views, infura_url, selector, view_calls
+
+# === Index Settings ===
+INDEX_DB = "chain_index.sqlite"
+CHUNK_BLOCKS = 2000  # blocks per eth_getLogs range
+CONFIRMATIONS = 3  # stay this far behind the head
+REORG_DEPTH = 12  # recent chunk-end hashes re-checked on every pass
+POLL_INTERVAL = 12  # seconds; about one Sepolia block
+MAX_AGE = 5 * POLL_INTERVAL  # seconds since the last pass before the index counts as stale
+RELEASE_SELECTOR = "0x" + bytes(Web3.keccak(text="releaseFunds(uint256)")[:4]).hex()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contracts (
+    address TEXT PRIMARY KEY,
+    start_block INTEGER NOT NULL,
+    checkpoint INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS logs (
+    address TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    topics TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE TABLE IF NOT EXISTS contract_state (
+    address TEXT PRIMARY KEY,
+    block INTEGER NOT NULL,
+    disbursed INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    finished REAL NOT NULL,
+    head INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS disbursements (
+    address TEXT PRIMARY KEY,
+    block INTEGER NOT NULL,
+    tx_hash TEXT,
+    actual_yield INTEGER
+);
+"""
+
+
+def _hex(value):
+    return value if isinstance(value, str) else "0x" + bytes(value).hex()
+
+
+class Indexer:
+    """Follows loan contracts block range by block range into a local SQLite index.
+
+    The deployed contract emits no events, so besides raw logs each chunk records
+    the contract's view state at the chunk's last block. When ``disbursed`` turns
+    true, the exact block is found by bisecting historical ``disbursed()`` reads
+    (this needs a node that serves archive state, as Infura does) and the
+    ``releaseFunds`` transaction in that block is stored with its yield.
+    """
+
+    def __init__(self, client, db_path=INDEX_DB):
+        self.client = client
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+
+    def add_contract(self, address, start_block):
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO contracts VALUES (?, ?, ?)",
+                            (Web3.to_checksum_address(address), start_block, start_block - 1))
+
+    def _call(self, method, params):
+        return self.client.rpc_batch([(method, params)])[0]
+
+    def _disbursed_at(self, address, block):
+        result = self._call("eth_call", [{"to": address, "data": selector("disbursed")}, hex(block)])
+        return decode(["bool"], HexBytes(result))[0]
+
+    def check_reorg(self):
+        """Roll back everything above the newest stored block hash the chain still agrees with."""
+        rows = self.db.execute("SELECT number, hash FROM blocks ORDER BY number DESC LIMIT ?", (REORG_DEPTH,)).fetchall()
+        if not rows:
+            return None
+        current = self.client.rpc_batch([("eth_getBlockByNumber", [hex(n), False]) for n, _ in rows])
+        fork = rows[-1][0] - 1
+        for (number, stored), block in zip(rows, current):
+            if block and block["hash"] == stored:
+                fork = number
+                break
+        if fork == rows[0][0]:
+            return None
+        with self.db:
+            for table, column in [("blocks", "number"), ("logs", "block"), ("contract_state", "block"),
+                                  ("disbursements", "block")]:
+                self.db.execute(f"DELETE FROM {table} WHERE {column} > ?", (fork,))
+            self.db.execute("UPDATE contracts SET checkpoint = MIN(checkpoint, ?)", (fork,))
+        return fork
+
+    def _index_chunk(self, address, start, end):
+        logs, block, *views = self.client.rpc_batch(
+            [("eth_getLogs", [{"address": address, "fromBlock": hex(start), "toBlock": hex(end)}]),
+             ("eth_getBlockByNumber", [hex(end), False])]
+            + view_calls(address, hex(end), self.client.abi))
+        state = decode_views(views, self.client.abi)
+        previous = self.db.execute("SELECT block, disbursed FROM contract_state WHERE address = ?",
+                                   (address,)).fetchone()
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?, ?, ?)", [
+                (address, int(log["blockNumber"], 16), log["transactionHash"], int(log["logIndex"], 16),
+                 json.dumps(log["topics"]), log["data"]) for log in logs])
+            self.db.execute("INSERT OR REPLACE INTO contract_state VALUES (?, ?, ?, ?)",
+                            (address, end, int(state["disbursed"]), json.dumps(state)))
+            self.db.execute("INSERT OR REPLACE INTO blocks VALUES (?, ?)", (end, block["hash"]))
+            self.db.execute("UPDATE contracts SET checkpoint = ? WHERE address = ?", (end, address))
+        if state["disbursed"] and not self.db.execute(
+                "SELECT 1 FROM disbursements WHERE address = ?", (address,)).fetchone():
+            if previous and not previous[1]:
+                low = previous[0] + 1
+            else:
+                low = self.db.execute("SELECT start_block FROM contracts WHERE address = ?",
+                                      (address,)).fetchone()[0]
+            self._record_disbursement(address, low, end)
+
+    def _record_disbursement(self, address, low, high):
+        while low < high:
+            mid = (low + high) // 2
+            if self._disbursed_at(address, mid):
+                high = mid
+            else:
+                low = mid + 1
+        tx_hash, actual_yield = None, None
+        for tx in self._call("eth_getBlockByNumber", [hex(high), True])["transactions"]:
+            if (tx.get("to") or "").lower() == address.lower() and _hex(tx["input"]).startswith(RELEASE_SELECTOR):
+                tx_hash, actual_yield = tx["hash"], int(_hex(tx["input"])[10:74], 16)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO disbursements VALUES (?, ?, ?, ?)",
+                            (address, high, tx_hash, actual_yield))
+
+    def run_once(self):
+        """Index every contract up to ``head - CONFIRMATIONS``; returns the number of chunks processed."""
+        self.check_reorg()
+        head = int(self._call("eth_blockNumber", []), 16) - CONFIRMATIONS
+        chunks = 0
+        for address, checkpoint in self.db.execute("SELECT address, checkpoint FROM contracts").fetchall():
+            while checkpoint < head:
+                end = min(checkpoint + CHUNK_BLOCKS, head)
+                self._index_chunk(address, checkpoint + 1, end)
+                checkpoint = end
+                chunks += 1
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO runs VALUES (0, ?, ?)", (time.time(), head))
+        return chunks
+
+    def follow(self, interval=POLL_INTERVAL):
+        while True:
+            self.run_once()
+            time.sleep(interval)
+
+
+def indexed_state(address, db_path=INDEX_DB, max_age=MAX_AGE):
+    """Last indexed view state of ``address`` plus its ``block``.
+
+    Returns None if it isn't indexed or the indexer hasn't finished a pass in
+    the last ``max_age`` seconds, so callers fall back to a live read.
+    """
+    if not os.path.exists(db_path):
+        return None
+    try:
+        with sqlite3.connect(db_path) as db:
+            run = db.execute("SELECT finished FROM runs WHERE id = 0").fetchone()
+            row = db.execute("SELECT block, state FROM contract_state WHERE address = ?",
+                             (Web3.to_checksum_address(address),)).fetchone()
+    except sqlite3.OperationalError:  # an index written before runs were recorded
+        return None
+    if row is None or run is None or time.time() - run[0] > max_age:
+        return None
+    return {**json.loads(row[1]), "block": row[0]}
+
+
+def disbursements(db_path=INDEX_DB):
+    with sqlite3.connect(db_path) as db:
+        db.row_factory = sqlite3.Row
+        return [dict(row) for row in db.execute("SELECT * FROM disbursements ORDER BY block")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index loan contract state into " + INDEX_DB)
+    parser.add_argument("start_block", type=int)
+    parser.add_argument("addresses", nargs="*", default=[CONTRACT_ADDRESS])
+    parser.add_argument("--rpc-url", default=None, help="defaults to Infura Sepolia via $INFURA_KEY")
+    parser.add_argument("--once", action="store_true", help="catch up to the head and exit")
+    args = parser.parse_args()
+    indexer = Indexer(ChainClient(args.rpc_url or infura_url(os.environ["INFURA_KEY"])))
+    for address in args.addresses:
+        indexer.add_contract(address, args.start_block)
+    if args.once:
+        print(f"Indexed {indexer.run_once()} chunks")
+    else:
+        indexer.follow()
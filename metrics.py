@@ -0,0 +1,87 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+# === Instrumentation Settings ===
+ENABLED = os.environ.get("APP_METRICS") == "1"
+LOG_FILE = os.environ.get("APP_METRICS_LOG", "metrics_log.jsonl")  # one JSON line per rerun
+PROM_FILE = os.environ.get("APP_METRICS_PROM", "metrics.prom")  # node_exporter textfile format
+
+_run = threading.local()  # Streamlit runs each session's script on its own thread
+_totals = {}  # stage -> [count, total seconds, max seconds]
+_lock = threading.Lock()
+
+
+def _active():
+    return ENABLED or getattr(_run, "debug", False)
+
+
+def record(stage, seconds):
+    stages = getattr(_run, "stages", None)
+    if stages is not None:
+        stages.append((stage, seconds))
+    if not ENABLED:
+        return
+    with _lock:
+        totals = _totals.setdefault(stage, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] = max(totals[2], seconds)
+
+
+@contextlib.contextmanager
+def timer(stage):
+    if not _active():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def start_run(debug=False):
+    """Start timing a rerun on this thread; ``debug`` times it even when ``APP_METRICS`` is off."""
+    _run.debug = debug
+    _run.stages = [] if _active() else None
+    _run.started = time.perf_counter()
+
+
+def end_run():
+    """Record the rerun total and return this run's stages.
+
+    Only when ``APP_METRICS=1`` are the stages also added to the process totals,
+    appended to ``LOG_FILE`` and exported to ``PROM_FILE``; a debug-only run
+    just returns its own timings.
+    """
+    if getattr(_run, "stages", None) is None:
+        return []
+    record("rerun_total", time.perf_counter() - _run.started)
+    stages, _run.stages, _run.debug = _run.stages, None, False
+    if not ENABLED:
+        return stages
+    with _lock:
+        with open(LOG_FILE, "a") as f:
+            f.write(json.dumps({"ts": time.time(), "stages": stages}) + "\n")
+        with open(PROM_FILE + ".tmp", "w") as f:
+            f.write(prometheus())
+        os.replace(PROM_FILE + ".tmp", PROM_FILE)
+    return stages
+
+
+def prometheus():
+    lines = [
+        "# HELP app_stage_seconds Time spent per dashboard stage.",
+        "# TYPE app_stage_seconds summary",
+    ]
+    for stage, (count, total, _) in sorted(_totals.items()):
+        lines.append(f'app_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+        lines.append(f'app_stage_seconds_count{{stage="{stage}"}} {count}')
+    lines += ["# HELP app_stage_seconds_max Slowest observation per dashboard stage.",
+              "# TYPE app_stage_seconds_max gauge"]
+    for stage, (_, _, longest) in sorted(_totals.items()):
+        lines.append(f'app_stage_seconds_max{{stage="{stage}"}} {longest:.6f}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import storage
+from cube import cube_for, cube_path
+from scoring import score_batch
+from stream import DEFAULT_FARM, READINGS_FILE, WINDOW
+
+# === Yield Model Settings ===
+FEATURES = ["soil_moisture", "temperature"]
+STATE_FILE = os.path.join(storage.DATA_DIR, "yield_predictions_state.json")
+
+
+def fit_model(history):
+    """Least-squares coefficients of ``yield_prediction ~ 1 + soil_moisture + temperature``."""
+    X = np.column_stack([np.ones(len(history))] + [history[f].to_numpy(dtype=np.float64) for f in FEATURES])
+    coef, *_ = np.linalg.lstsq(X, history["yield_prediction"].to_numpy(dtype=np.float64), rcond=None)
+    return coef
+
+
+def predict_farms(readings, coef, window=WINDOW):
+    """One yield prediction per farm from the mean of its last ``window`` readings."""
+    recent = readings.sort_values("timestamp").groupby("farm_id").tail(window)
+    grouped = recent.groupby("farm_id")
+    features = grouped[FEATURES].mean()
+    X = np.column_stack([np.ones(len(features))] + [features[f].to_numpy() for f in FEATURES])
+    return pd.DataFrame({
+        "farm_id": features.index,
+        "yield_prediction": np.maximum(X @ coef, 0).round().astype(np.int64),
+        "last_reading": grouped["timestamp"].max().to_list(),
+    })
+
+
+def _predict_shard(args):
+    readings, coef = args
+    return predict_farms(readings, coef)
+
+
+def load_readings(path=READINGS_FILE):
+    """Sensor readings from the JSONL feed with a UTC ``timestamp`` (epoch seconds or ISO strings).
+
+    As in ``SensorPipeline``, a reading without ``farm_id`` belongs to ``DEFAULT_FARM``.
+    """
+    readings = pd.read_json(path, lines=True, convert_dates=False, dtype=False)
+    readings["farm_id"] = readings["farm_id"].fillna(DEFAULT_FARM) if "farm_id" in readings else DEFAULT_FARM
+    for feature in FEATURES:
+        if feature not in readings:
+            readings[feature] = np.nan
+    if "timestamp" not in readings:
+        readings["timestamp"] = readings.get("date")
+    numeric = pd.to_numeric(readings["timestamp"], errors="coerce")
+    readings["timestamp"] = pd.to_datetime(numeric, unit="s", utc=True).fillna(
+        pd.to_datetime(readings["timestamp"].where(numeric.isna()), utc=True, errors="coerce", format="mixed"))
+    return readings.dropna(subset=["farm_id", "timestamp"] + FEATURES)
+
+
+def _load_state():
+    try:
+        with open(STATE_FILE) as f:
+            return {farm: pd.Timestamp(ts) for farm, ts in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+
+
+def _save_state(state):
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({farm: ts.isoformat() for farm, ts in state.items()}, f)
+    os.replace(tmp, STATE_FILE)
+
+
+def write_back(predictions, name="federated"):
+    """Replace yield_prediction and credit_score for the predicted farms in the dataset's source CSV.
+
+    Rewriting the CSV bumps its mtime, which rebuilds the Parquet and compact
+    copies and invalidates every cache keyed on the dataset version. The summary
+    cube is carried over to the new version by rescoring only the changed farms.
+    """
+    source = storage.DATASETS[name]["source"]
+    cube = cube_for(storage.ensure_dataset(name), name)
+    farms = pd.read_csv(source)
+    farms["credit_score"] = score_batch(farms)
+    updated = farms["farm_id"].map(predictions.set_index("farm_id")["yield_prediction"])
+    hit = updated.notna()
+    old_rows = farms[hit].copy()
+    farms.loc[hit, "yield_prediction"] = updated[hit].astype(np.int64)
+    farms["credit_score"] = score_batch(farms)
+    tmp = source + ".tmp"
+    farms.to_csv(tmp, index=False)
+    os.replace(tmp, source)
+    cube.rescore(old_rows, farms[hit])
+    cube.refresh(farms)
+    cube.save(cube_path(name), os.path.getmtime(source))
+    return int(hit.sum())
+
+
+def run(readings_path=READINGS_FILE, incremental=False, workers=None):
+    readings = load_readings(readings_path)
+    state = _load_state() if incremental else {}
+    if incremental and state:
+        latest = readings.groupby("farm_id")["timestamp"].max()
+        seen = latest.index.map(lambda farm: state.get(farm, pd.Timestamp.min.tz_localize("UTC")))
+        readings = readings[readings["farm_id"].isin(latest.index[latest.to_numpy() > seen.to_numpy()])]
+    farm_ids = readings["farm_id"].unique()
+    if not len(farm_ids):
+        return {"farms_predicted": 0, "farms_updated": 0}
+
+    coef = fit_model(storage.load("sensors"))
+    workers = workers or os.cpu_count()
+    shards = [readings[readings["farm_id"].isin(ids)] for ids in np.array_split(farm_ids, workers) if len(ids)]
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        predictions = pd.concat(pool.map(_predict_shard, [(shard, coef) for shard in shards]), ignore_index=True)
+
+    updated = write_back(predictions)
+    state.update(zip(predictions["farm_id"], pd.to_datetime(predictions["last_reading"], utc=True)))
+    _save_state(state)
+    return {"farms_predicted": len(predictions), "farms_updated": updated}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predict yields from sensor history and rescore the federated farms")
+    parser.add_argument("--readings", default=READINGS_FILE)
+    parser.add_argument("--incremental", action="store_true", help="only farms with readings since the last run")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    print(json.dumps(run(args.readings, args.incremental, args.workers)))
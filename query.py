@@ -0,0 +1,56 @@
+import functools
+
+import storage
+from cube import DIMENSIONS, METRICS, cube_for
+from scoring import score_batch
+
+# === Federated Query Layer ===
+FARM_COLUMNS = ["farm_id", "region", "asset_type", "soil_moisture", "temperature", "yield_prediction"]
+AGGREGATE_CACHE_SIZE = 256
+ROW_CACHE_SIZE = 8
+
+
+def selection(values):
+    """Normalize a multiselect value into a hashable, order-independent cache key."""
+    return tuple(sorted(set(values)))
+
+
+@functools.lru_cache(maxsize=2)
+def summary_cube(version):
+    """The region × asset_type × score-bucket cube for one dataset version."""
+    return cube_for(version)
+
+
+@functools.lru_cache(maxsize=AGGREGATE_CACHE_SIZE)
+def _asset_type_means(version, regions, asset_types):
+    return summary_cube(version).means_by(["asset_type"], regions, asset_types)[["asset_type"] + METRICS]
+
+
+def asset_type_means(version, regions, asset_types):
+    """Mean of each metric by asset_type over the selected farms, re-aggregated from the cube."""
+    return _asset_type_means(version, selection(regions), selection(asset_types))
+
+
+@functools.lru_cache(maxsize=AGGREGATE_CACHE_SIZE)
+def _score_cells(version, regions, asset_types):
+    return summary_cube(version).means_by(DIMENSIONS, regions, asset_types)
+
+
+def score_cells(version, regions, asset_types):
+    """One row per selected region × asset_type × score bucket with farm count, means and extremes."""
+    return _score_cells(version, selection(regions), selection(asset_types))
+
+
+@functools.lru_cache(maxsize=ROW_CACHE_SIZE)
+def _farm_rows(version, regions, asset_types):
+    df = storage.load_compact("federated", columns=FARM_COLUMNS, filters={"region": regions, "asset_type": asset_types})
+    df["credit_score"] = score_batch(df)
+    return df
+
+
+def farm_rows(version, regions, asset_types):
+    """Scored farm rows for the selection, with categorical strings and float32 sensor readings.
+
+    Cached frames are shared across sessions, so treat them as read-only.
+    """
+    return _farm_rows(version, selection(regions), selection(asset_types))
@@ -0,0 +1,50 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# === Scoring Model ===
+YIELD_PER_POINT = 20
+MIN_SCORE = 30
+MAX_SCORE = 100
+SIMULATED_THRESHOLD = 1500  # yield threshold used when the contract isn't consulted
+INPUT_COLUMNS = ["yield_prediction", "soil_moisture", "temperature", "asset_type"]
+RESCORE_CHUNK_ROWS = 1_000_000
+
+
+def score_batch(df):
+    """Credit score for every farm in ``df`` in one vectorized pass.
+
+    The score is ``yield_prediction / 20`` truncated and clipped to 30..100; farms
+    with no yield get the minimum. Rows may carry the other ``INPUT_COLUMNS`` (and
+    anything else) unchanged, so a farm table can be passed as-is.
+    """
+    yields = np.nan_to_num(df["yield_prediction"].to_numpy(dtype=np.float64), nan=0.0)
+    scores = np.clip(np.floor(yields / YIELD_PER_POINT), MIN_SCORE, MAX_SCORE)
+    return pd.Series(scores.astype(np.int64), index=df.index, name="credit_score")
+
+
+def score_farm(yield_prediction, soil_moisture=None, temperature=None, asset_type=None):
+    farm = pd.DataFrame({"yield_prediction": [yield_prediction], "soil_moisture": [soil_moisture],
+                         "temperature": [temperature], "asset_type": [asset_type]})
+    return int(score_batch(farm).iloc[0])
+
+
+def meets_threshold(yield_prediction, threshold=SIMULATED_THRESHOLD):
+    return yield_prediction >= threshold
+
+
+def rescore_csv(src, dst, chunk_rows=RESCORE_CHUNK_ROWS):
+    """Rewrite ``credit_score`` for a whole farm table, ``chunk_rows`` rows at a time."""
+    rows = 0
+    for i, chunk in enumerate(pd.read_csv(src, chunksize=chunk_rows)):
+        chunk["credit_score"] = score_batch(chunk)
+        chunk.to_csv(dst, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        rows += len(chunk)
+    return rows
+
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else "federated_farm_data.csv"
+    dst = sys.argv[2] if len(sys.argv) > 2 else src + ".rescored"
+    print(f"Rescored {rescore_csv(src, dst)} farms -> {dst}")
@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+from web3 import Web3
+
+from chain import ChainClient, infura_url
+from scoring import SIMULATED_THRESHOLD, meets_threshold, score_batch, score_farm
+
+# === Service Settings ===
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+INLINE_BYTES = 256 * 1024  # larger /score bodies are parsed and scored in a worker process
+SCORE_USAGE = "expected {\"farms\": [{\"yield_prediction\": ...}, ...]}"
+
+
+def _score_body(raw):
+    """Parse a ``/score`` body and score every farm; raises ``ValueError`` with a client-facing message.
+
+    Only the yields are pulled out of the farm dicts, into one float array, so
+    the work is the JSON parse plus a single vectorized ``score_batch`` call.
+    """
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        raise ValueError("request body is not valid JSON")
+    farms = body.get("farms") if isinstance(body, dict) else None
+    if not isinstance(farms, list) or any(not isinstance(f, dict) or "yield_prediction" not in f for f in farms):
+        raise ValueError(SCORE_USAGE)
+    try:
+        yields = np.array([f["yield_prediction"] for f in farms], dtype=np.float64)
+    except (TypeError, ValueError):
+        yields = None
+    if yields is None or yields.ndim != 1:
+        raise ValueError("every 'yield_prediction' must be a number")
+    return score_batch(pd.DataFrame({"yield_prediction": yields})).tolist()
+
+
+async def score(request):
+    """POST ``{"farms": [{"yield_prediction": ..., ...}, ...]}`` -> ``{"scores": [...]}``."""
+    raw = await request.read()
+    try:
+        if len(raw) <= INLINE_BYTES:
+            scores = _score_body(raw)
+        else:
+            # Ship the raw bytes, not parsed dicts: pickling them is cheap and the
+            # event loop stays free while the worker parses and scores.
+            scores = await asyncio.get_running_loop().run_in_executor(request.app["pool"], _score_body, raw)
+    except ValueError as e:
+        raise web.HTTPBadRequest(text=str(e))
+    return web.json_response({"scores": scores})
+
+
+async def _contract_state(app, address=None):
+    if app["chain"] is None:
+        raise web.HTTPServiceUnavailable(text="INFURA_KEY is not configured")
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, app["chain"].snapshot, address)
+    except Exception as e:  # unreachable node, RPC error reply or undecodable view data
+        raise web.HTTPBadGateway(text="chain read failed: " + str(e))
+
+
+async def evaluate(request):
+    """GET ``/evaluate?yield=1517[&threshold=1500]``; the threshold defaults to the contract's."""
+    try:
+        yield_prediction = int(request.query["yield"])
+        threshold = request.query.get("threshold")
+        threshold = int(threshold) if threshold is not None else None
+    except (KeyError, ValueError):
+        raise web.HTTPBadRequest(text="expected integer 'yield' (and optional 'threshold')")
+    source = "request"
+    if threshold is None:
+        if request.app["chain"] is not None:
+            threshold, source = (await _contract_state(request.app))["yieldThreshold"], "contract"
+        else:
+            threshold, source = SIMULATED_THRESHOLD, "simulated"
+    return web.json_response({
+        "yield": yield_prediction,
+        "threshold": threshold,
+        "threshold_source": source,
+        "credit_score": score_farm(yield_prediction),
+        "meets_threshold": meets_threshold(yield_prediction, threshold),
+    })
+
+
+async def contract_state(request):
+    address = request.query.get("address")
+    if address is not None:
+        try:
+            address = Web3.to_checksum_address(address)
+        except ValueError:
+            raise web.HTTPBadRequest(text="'address' is not a valid contract address")
+    return web.json_response(await _contract_state(request.app, address))
+
+
+async def health(request):
+    return web.json_response({"status": "ok", "chain": request.app["chain"] is not None})
+
+
+async def _lifecycle(app):
+    app["pool"] = ProcessPoolExecutor(max_workers=app["workers"])
+    yield
+    app["pool"].shutdown(cancel_futures=True)
+
+
+def create_app(rpc_url=None, workers=None):
+    app = web.Application(client_max_size=256 * 1024 ** 2)
+    app["workers"] = workers or os.cpu_count()
+    app["chain"] = ChainClient(rpc_url) if rpc_url else None
+    app.cleanup_ctx.append(_lifecycle)
+    app.add_routes([
+        web.post("/score", score),
+        web.get("/evaluate", evaluate),
+        web.get("/contract/state", contract_state),
+        web.get("/health", health),
+    ])
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless scoring and contract-state service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    key = os.environ.get("INFURA_KEY")
+    web.run_app(create_app(infura_url(key) if key else None, args.workers), host=args.host, port=args.port)
@@ -0,0 +1,29 @@
+import requests
+
+REQUEST_TIMEOUT = 10  # seconds
+
+
+class ServiceClient:
+    """Blocking client for ``service.py``, so the dashboard can delegate scoring and chain reads."""
+
+    def __init__(self, base_url, timeout=REQUEST_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _request(self, method, path, **kwargs):
+        response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def score(self, farms):
+        return self._request("POST", "/score", json={"farms": farms})["scores"]
+
+    def evaluate(self, yield_prediction, threshold=None):
+        params = {"yield": int(yield_prediction)}
+        if threshold is not None:
+            params["threshold"] = int(threshold)
+        return self._request("GET", "/evaluate", params=params)
+
+    def contract_state(self, address=None):
+        return self._request("GET", "/contract/state", params={"address": address} if address else None)
@@ -0,0 +1,231 @@
+import functools
+import os
+import shutil
+import sys
+import threading
+import uuid
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+
+from metrics import timer
+
+# === Dataset Layout ===
+DATA_DIR = "data"
+DATASETS = {
+    "federated": {
+        "source": "federated_farm_data.csv",
+        "columns": ["farm_id", "region", "asset_type", "soil_moisture", "temperature", "yield_prediction",
+                    "credit_score"],
+        "partitions": ["region", "asset_type"],
+        # In-memory layout: categorical region/asset_type and narrow numbers. farm_id stays a
+        # plain string: every id is unique, so a dictionary would be as large as the column
+        # and to_pandas() would rebuild a full-size Categorical on every load.
+        "compact": {
+            "farm_id": pa.string(),
+            "region": pa.dictionary(pa.int16(), pa.string()),
+            "asset_type": pa.dictionary(pa.int16(), pa.string()),
+            "soil_moisture": pa.float32(),
+            "temperature": pa.float32(),
+            "yield_prediction": pa.int32(),
+            "credit_score": pa.int16(),
+        },
+    },
+    "sensors": {
+        "source": "cassava_farm_data.csv",
+        "columns": ["date", "soil_moisture", "temperature", "yield_prediction"],
+        # One directory per year-month; within a month, row-group statistics on
+        # ``date`` do the pruning. Partitioning on the raw date exceeds Arrow's
+        # 1024-partition limit after a few years of daily rows (or a day of minutes).
+        "partitions": ["month"],
+        "derived": {"month": ("date", 7)},
+    },
+}
+MARKER = "_SOURCE_MTIME"
+
+_build_lock = threading.Lock()
+
+
+def dataset_path(name):
+    return os.path.join(DATA_DIR, name)
+
+
+def _built_version(name):
+    # The marker records the partition layout too, so a layout change forces a rebuild.
+    try:
+        with open(os.path.join(dataset_path(name), MARKER)) as f:
+            version, _, layout = f.read().partition(" ")
+        if layout.split(",") != DATASETS[name]["partitions"]:
+            return None
+        return float(version)
+    except (OSError, ValueError):
+        return None
+
+
+def _with_derived(reader, derived):
+    """Append each derived column as a fixed-length prefix of its source column."""
+    if not derived:
+        return reader
+    schema = reader.schema
+    for column in derived:
+        schema = schema.append(pa.field(column, pa.string()))
+
+    def batches():
+        for batch in reader:
+            arrays = batch.columns + [pc.utf8_slice_codeunits(batch.column(source), 0, length)
+                                      for source, length in derived.values()]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    return pa.RecordBatchReader.from_batches(schema, batches())
+
+
+def build_dataset(name):
+    """Stream the source CSV into a hive-partitioned Parquet dataset under ``DATA_DIR``."""
+    spec = DATASETS[name]
+    path = dataset_path(name)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    version = os.path.getmtime(spec["source"])
+    derived = spec.get("derived", {})
+    # Keep partition values (and the columns they derive from) as the strings they are in the CSV.
+    strings = [col for col in spec["partitions"] if col not in derived] + [src for src, _ in derived.values()]
+    convert = pacsv.ConvertOptions(column_types={col: "string" for col in strings})
+    try:
+        with timer("csv_to_parquet:" + name):
+            reader = _with_derived(pacsv.open_csv(spec["source"], convert_options=convert), derived)
+            ds.write_dataset(reader, tmp, format="parquet", partitioning=spec["partitions"],
+                             partitioning_flavor="hive")
+        with open(os.path.join(tmp, MARKER), "w") as f:
+            f.write(f"{version!r} {','.join(spec['partitions'])}")
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    with _build_lock:
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+    return path
+
+
+def ensure_dataset(name):
+    """Build the Parquet copy if it is missing or was built from another version of its CSV; return its version."""
+    version = _built_version(name)
+    # Any mtime change counts: a CSV restored from a backup is older than the copy built from it.
+    if version is None or version != os.path.getmtime(DATASETS[name]["source"]):
+        build_dataset(name)
+        version = _built_version(name)
+    return version
+
+
+@functools.lru_cache(maxsize=8)
+def _open(name, version):
+    partitioning = ds.partitioning(pa.schema([(col, pa.string()) for col in DATASETS[name]["partitions"]]),
+                                   flavor="hive")
+    return ds.dataset(dataset_path(name), format="parquet", partitioning=partitioning,
+                      exclude_invalid_files=True, ignore_prefixes=["_", "."])
+
+
+def open_dataset(name):
+    return _open(name, ensure_dataset(name))
+
+
+def partition_values(name, column):
+    """Distinct values of a partition column, read from directory names only."""
+    values = set()
+    for fragment in open_dataset(name).get_fragments():
+        values.add(str(ds.get_partition_keys(fragment.partition_expression)[column]))
+    return sorted(values)
+
+
+def _predicate(filters):
+    predicate = None
+    for column, values in (filters or {}).items():
+        condition = ds.field(column).isin(pa.array([str(v) for v in values], pa.string()))
+        predicate = condition if predicate is None else predicate & condition
+    return predicate
+
+
+def load(name, columns=None, filters=None):
+    """Read ``columns`` of a dataset as a DataFrame, keeping only rows matching ``filters``.
+
+    ``filters`` maps a column to its allowed values; conditions on partition
+    columns prune whole directories before any Parquet file is opened.
+    """
+    columns = columns or DATASETS[name]["columns"]
+    with timer("read:" + name):
+        return open_dataset(name).to_table(columns=columns, filter=_predicate(filters)).to_pandas()
+
+
+def compact_path(name):
+    return os.path.join(DATA_DIR, name + ".arrow")
+
+
+def _compact_version(name):
+    # A copy written with a different ``compact`` schema counts as missing, so it is rebuilt.
+    types = DATASETS[name]["compact"]
+    try:
+        with pa.memory_map(compact_path(name)) as source:
+            schema = pa.ipc.open_file(source).schema
+        if [(field.name, field.type) for field in schema] != list(types.items()):
+            return None
+        return float(schema.metadata[b"source_version"])
+    except (OSError, KeyError, TypeError, ValueError, pa.ArrowInvalid):
+        return None
+
+
+def build_compact(name, version):
+    """Write the dataset as one uncompressed Arrow IPC file in its ``compact`` schema."""
+    types = DATASETS[name]["compact"]
+    with timer("parquet_to_arrow:" + name):
+        table = open_dataset(name).to_table(columns=list(types))
+        table = table.cast(pa.schema([(col, types[col]) for col in types],
+                                     metadata={"source_version": repr(version)})).unify_dictionaries()
+        tmp = f"{compact_path(name)}.{uuid.uuid4().hex}.tmp"
+        try:
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, compact_path(name))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+def ensure_compact(name):
+    version = ensure_dataset(name)
+    if _compact_version(name) != version:
+        build_compact(name, version)
+    return version
+
+
+@functools.lru_cache(maxsize=2)
+def _open_compact(name, version):
+    # Buffers point into the mapping, so every session (and every process on the
+    # host) shares the same page-cache pages instead of holding its own copy.
+    return pa.ipc.open_file(pa.memory_map(compact_path(name))).read_all()
+
+
+def compact_table(name):
+    """The dataset as a read-only, memory-mapped Arrow table in its ``compact`` schema."""
+    return _open_compact(name, ensure_compact(name))
+
+
+def load_compact(name, columns=None, filters=None):
+    """Like ``load()`` but served from the memory-mapped compact copy, with categorical dtypes."""
+    table = compact_table(name)
+    with timer("read_compact:" + name):
+        # A boolean mask from is_in() on the dictionary columns is about 3x faster here
+        # than filtering through a dataset expression, which decodes them first.
+        mask = None
+        for column, values in (filters or {}).items():
+            condition = pc.is_in(table[column], value_set=pa.array([str(v) for v in values], pa.string()))
+            mask = condition if mask is None else pc.and_(mask, condition)
+        table = table.select(columns or table.column_names)
+        if mask is not None:
+            table = table.filter(mask)
+        return table.to_pandas(split_blocks=True)
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or DATASETS:
+        print(f"{name}: {build_dataset(name)}")
@@ -0,0 +1,154 @@
+import json
+import os
+import queue
+import threading
+from collections import deque
+
+# === Sensor Stream Settings ===
+READINGS_FILE = "sensor_readings.jsonl"
+SENSOR_FIELDS = ["soil_moisture", "temperature", "yield_prediction"]
+DEFAULT_FARM = "cassava"
+WINDOW = 7  # readings per rolling window
+POLL_INTERVAL = 1.0  # seconds between checks for new lines
+
+
+class RollingStat:
+    """All-time mean plus mean/min/max over the last ``window`` values, O(1) amortized per update."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.count = 0
+        self.total = 0.0
+        self.last = None
+        self._values = deque()
+        self._window_total = 0.0
+        self._min = deque()  # (index, value), values increasing
+        self._max = deque()  # (index, value), values decreasing
+
+    def update(self, value):
+        index = self.count
+        self.count += 1
+        self.total += value
+        self.last = value
+        self._values.append(value)
+        self._window_total += value
+        if len(self._values) > self.window:
+            self._window_total -= self._values.popleft()
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+        oldest = index - self.window + 1
+        if self._min[0][0] < oldest:
+            self._min.popleft()
+        if self._max[0][0] < oldest:
+            self._max.popleft()
+
+    def summary(self):
+        if not self.count:
+            return None
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "last": self.last,
+            "window_mean": self._window_total / len(self._values),
+            "window_min": self._min[0][1],
+            "window_max": self._max[0][1],
+        }
+
+
+def tail_jsonl(path, stop, poll_interval=POLL_INTERVAL):
+    """Yield JSON objects appended to ``path`` until ``stop`` is set, starting from the beginning.
+
+    Waits for the file to appear, holds back a trailing partial line until it is
+    completed, and starts over if the file is truncated or replaced.
+    """
+    offset, inode, buffer = 0, None, b""
+    while not stop.is_set():
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stop.wait(poll_interval)
+            continue
+        if stat.st_ino != inode or stat.st_size < offset:
+            offset, inode, buffer = 0, stat.st_ino, b""
+        if stat.st_size == offset:
+            stop.wait(poll_interval)
+            continue
+        with open(path, "rb") as f:
+            f.seek(offset)
+            chunk = f.read()
+        offset += len(chunk)
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+class SensorPipeline:
+    """Per-farm rolling aggregates fed from a local queue and/or a tailed JSONL file."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.queue = queue.Queue()
+        self.farms = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def ingest(self, reading):
+        farm_id = reading.get("farm_id", DEFAULT_FARM)
+        with self._lock:
+            farm = self.farms.get(farm_id)
+            if farm is None:
+                farm = self.farms[farm_id] = {field: RollingStat(self.window) for field in SENSOR_FIELDS}
+            for field in SENSOR_FIELDS:
+                value = reading.get(field)
+                if value is not None:
+                    farm[field].update(float(value))
+            farm["updated_at"] = reading.get("timestamp", reading.get("date"))
+
+    def put(self, reading):
+        self.queue.put(reading)
+
+    def aggregates(self, farm_id=DEFAULT_FARM):
+        """Current stats for one farm, e.g. ``aggregates()["yield_prediction"]["mean"]``."""
+        farm = self.farms.get(farm_id)
+        if farm is None:
+            return None
+        with self._lock:
+            stats = {field: farm[field].summary() for field in SENSOR_FIELDS}
+            stats["updated_at"] = farm["updated_at"]
+        return stats
+
+    def _drain_queue(self):
+        while not self._stop.is_set():
+            try:
+                self.ingest(self.queue.get(timeout=POLL_INTERVAL))
+            except queue.Empty:
+                continue
+
+    def _follow(self, path):
+        for reading in tail_jsonl(path, self._stop):
+            self.ingest(reading)
+
+    def start(self, path=READINGS_FILE):
+        """Consume the queue and tail ``path`` (if given) on background threads."""
+        targets = [(self._drain_queue, ())]
+        if path:
+            targets.append((self._follow, (path,)))
+        for target, args in targets:
+            thread = threading.Thread(target=target, args=args, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import random
+import sys
+
+import aiohttp
+from web3 import Web3
+
+from chain import ABI, batch_payload, batch_results, decode_views, view_calls, view_functions
+
+# === Sweep Settings ===
+CONCURRENCY = 8  # JSON-RPC batches in flight at once
+BATCH_SIZE = 25  # contracts per JSON-RPC batch
+RETRIES = 4
+BACKOFF_BASE = 0.5  # seconds; doubled on every retry
+REQUEST_TIMEOUT = 30
+
+
+class RetryableError(Exception):
+    pass
+
+
+def _quantity(value):
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+def http_transport(session, rpc_url):
+    async def post(payload):
+        async with session.post(rpc_url, json=payload) as response:
+            if response.status == 429 or response.status >= 500:
+                raise RetryableError(f"HTTP {response.status}")
+            response.raise_for_status()
+            replies = await response.json(content_type=None)
+            return replies if isinstance(replies, list) else [replies]
+    return post
+
+
+def web3_transport(w3):
+    """Adapt a synchronous ``Web3`` (e.g. over ``EthereumTesterProvider``) to the sweep transport."""
+    # eth-tester insists on a funded sender for eth_call; real nodes don't need one.
+    sender = w3.eth.accounts[0] if w3.eth.accounts else None
+
+    async def post(payload):
+        replies = []
+        for request in payload:
+            params = request["params"]
+            if request["method"] == "eth_call" and sender:
+                params = [{"from": sender, **params[0]}] + params[1:]
+            try:
+                replies.append({"id": request["id"], "result": w3.manager.request_blocking(request["method"], params)})
+            except Exception as e:
+                replies.append({"id": request["id"], "error": {"message": str(e)}})
+        return replies
+    return post
+
+
+async def _with_retries(post, payload, retries):
+    for attempt in range(retries + 1):
+        try:
+            return await post(payload)
+        except (RetryableError, aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == retries:
+                raise
+            await asyncio.sleep(BACKOFF_BASE * 2 ** attempt * (1 + random.random()))
+
+
+def _message(error):
+    return str(error.get("message", error)) if isinstance(error, dict) else str(error)
+
+
+async def _sweep_batch(post, addresses, block, abi, semaphore, retries):
+    per_contract = len(view_functions(abi))
+    calls = [call for address in addresses for call in view_calls(address, hex(block), abi)]
+    async with semaphore:
+        try:
+            replies = await _with_retries(post, batch_payload(calls), retries)
+        except Exception as e:
+            return {address: {"error": str(e)} for address in addresses}
+    # Match replies to requests by id: nodes may reorder them, drop some, or answer a
+    # rejected batch with a single ``{"id": null, "error": ...}``.
+    by_id = {reply.get("id"): reply for reply in replies if isinstance(reply, dict)}
+    batch_error = by_id.get(None, {}).get("error")
+    states = {}
+    for i, address in enumerate(addresses):
+        chunk = [by_id.get(request_id) for request_id in range(i * per_contract, (i + 1) * per_contract)]
+        try:
+            if any(reply is None for reply in chunk):
+                raise RuntimeError(_message(batch_error) if batch_error else "missing reply in JSON-RPC batch")
+            errors = [reply["error"] for reply in chunk if "error" in reply]
+            if errors:
+                raise RuntimeError(_message(errors[0]))
+            states[address] = decode_views([reply["result"] for reply in chunk], abi)
+        except Exception as e:
+            states[address] = {"error": str(e)}
+    return states
+
+
+async def sweep(addresses, rpc_url=None, transport=None, abi=ABI, concurrency=CONCURRENCY,
+                batch_size=BATCH_SIZE, retries=RETRIES):
+    """View state of every loan contract in ``addresses``, all read at one block.
+
+    Contracts are grouped ``batch_size`` to a JSON-RPC batch with at most
+    ``concurrency`` batches in flight; failed batches are retried with
+    exponential backoff and contracts that still fail carry an ``"error"``.
+    Pass ``transport`` (an ``async post(payload) -> replies``) to sweep a local
+    test backend instead of ``rpc_url``.
+    """
+    addresses = [Web3.to_checksum_address(a) for a in addresses]
+    session = None
+    if transport is None:
+        session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+                                        connector=aiohttp.TCPConnector(limit=concurrency))
+        transport = http_transport(session, rpc_url)
+    try:
+        block_replies = await _with_retries(transport, batch_payload([("eth_blockNumber", [])]), retries)
+        block = _quantity(batch_results(block_replies, 1)[0])
+        semaphore = asyncio.Semaphore(concurrency)
+        batches = [addresses[i:i + batch_size] for i in range(0, len(addresses), batch_size)]
+        results = await asyncio.gather(*(_sweep_batch(transport, batch, block, abi, semaphore, retries)
+                                         for batch in batches))
+    finally:
+        if session is not None:
+            await session.close()
+    contracts = {address: state for states in results for address, state in states.items()}
+    return {"block": block, "contracts": contracts}
+
+
+def disbursement_summary(result):
+    states = result["contracts"].values()
+    return {
+        "block": result["block"],
+        "contracts": len(states),
+        "disbursed": sum(1 for s in states if s.get("disbursed") is True),
+        "pending": sum(1 for s in states if s.get("disbursed") is False),
+        "errors": sum(1 for s in states if "error" in s),
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python sweep.py <rpc_url> <addresses.txt>")
+    with open(sys.argv[2]) as f:
+        addresses = [line.strip() for line in f if line.strip()]
+    result = asyncio.run(sweep(addresses, rpc_url=sys.argv[1]))
+    print(json.dumps({"summary": disbursement_summary(result), **result}, indent=2))
@@ -0,0 +1,182 @@
+import os
+import sys
+from collections.abc import Mapping
+
+import pytest
+from eth_account import Account
+from web3 import EthereumTesterProvider, Web3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chain import ABI  # noqa: E402
+
+THRESHOLD = 1500
+ESCROW = Web3.to_wei(1, "ether")
+
+# Storage layout of the test loan contract.
+LENDER, BORROWER, AMOUNT, THRESHOLD_SLOT, DISBURSED = range(5)
+
+
+def _push(value, size):
+    return bytes([0x5f + size]) + value.to_bytes(size, "big")
+
+
+def _assemble(program):
+    """Tiny EVM assembler: ints are opcodes, ``("push", n, size)`` pushes, ``("label", x)``/``("ref", x)`` jump."""
+    def encode(offsets):
+        code = b""
+        for item in program:
+            if isinstance(item, int):
+                code += bytes([item])
+            elif item[0] == "label":
+                offsets[item[1]] = len(code)
+                code += b"\x5b"  # JUMPDEST
+            elif item[0] == "ref":
+                code += _push(offsets.get(item[1], 0), 2)
+            else:
+                code += _push(item[1], item[2])
+        return code
+
+    offsets = {}
+    encode(offsets)
+    return encode(offsets)
+
+
+def _string_return(text):
+    word = int.from_bytes(text.encode().ljust(32, b"\0"), "big")
+    return [("push", 0x20, 1), ("push", 0, 1), 0x52,  # MSTORE offset word
+            ("push", len(text), 1), ("push", 0x20, 1), 0x52,
+            ("push", word, 32), ("push", 0x40, 1), 0x52,
+            ("push", 0x60, 1), ("push", 0, 1), 0xf3]  # RETURN
+
+
+def loan_runtime():
+    """Runtime code implementing the deployed loan contract's ABI.
+
+    ``releaseFunds(actualYield)`` reverts unless the lender calls it, funds are
+    not yet disbursed and ``actualYield >= yieldThreshold``; it then sends the
+    escrow to the borrower.
+    """
+    getters = {"lender": LENDER, "borrower": BORROWER, "amount": AMOUNT, "yieldThreshold": THRESHOLD_SLOT,
+               "disbursed": DISBURSED}
+    program = [("push", 0, 1), 0x35, ("push", 0xe0, 1), 0x1c]  # CALLDATALOAD(0) >> 224
+    for name, signature in [(name, name + "()") for name in list(getters) + ["getStatus"]] + [
+            ("releaseFunds", "releaseFunds(uint256)")]:
+        selector = int.from_bytes(Web3.keccak(text=signature)[:4], "big")
+        program += [0x80, ("push", selector, 4), 0x14, ("ref", name), 0x57]  # DUP1 PUSH4 EQ JUMPI
+    program += [("ref", "revert"), 0x56]
+    for name, slot in getters.items():
+        program += [("label", name), ("push", slot, 1), 0x54, ("push", 0, 1), 0x52,
+                    ("push", 0x20, 1), ("push", 0, 1), 0xf3]
+    program += [("label", "getStatus"), ("push", DISBURSED, 1), 0x54, ("ref", "released"), 0x57]
+    program += _string_return("Pending")
+    program += [("label", "released")] + _string_return("Disbursed")
+    program += [("label", "releaseFunds"),
+                0x33, ("push", LENDER, 1), 0x54, 0x14, 0x15, ("ref", "revert"), 0x57,  # CALLER == lender
+                ("push", DISBURSED, 1), 0x54, ("ref", "revert"), 0x57,  # !disbursed
+                ("push", THRESHOLD_SLOT, 1), 0x54, ("push", 4, 1), 0x35, 0x10, ("ref", "revert"), 0x57,
+                ("push", 1, 1), ("push", DISBURSED, 1), 0x55,
+                ("push", 0, 1), ("push", 0, 1), ("push", 0, 1), ("push", 0, 1),  # CALL(gas, borrower, amount)
+                ("push", AMOUNT, 1), 0x54, ("push", BORROWER, 1), 0x54, 0x5a, 0xf1, 0x50, 0x00]
+    program += [("label", "revert"), ("push", 0, 1), 0x80, 0xfd]
+    return _assemble(program)
+
+
+def loan_initcode(borrower, threshold):
+    """Constructor: the deployer is the lender and the sent value is the escrow."""
+    runtime = loan_runtime()
+
+    def constructor(runtime_offset):
+        return _assemble([
+            0x33, ("push", LENDER, 1), 0x55, 0x34, ("push", AMOUNT, 1), 0x55,
+            ("push", 0x40, 1), ("push", 0x40, 1), 0x38, 0x03, ("push", 0, 1), 0x39,  # args -> memory
+            ("push", 0, 1), 0x51, ("push", BORROWER, 1), 0x55,
+            ("push", 0x20, 1), 0x51, ("push", THRESHOLD_SLOT, 1), 0x55,
+            ("push", len(runtime), 2), ("push", runtime_offset, 2), ("push", 0, 1), 0x39,
+            ("push", len(runtime), 2), ("push", 0, 1), 0xf3])
+
+    # The runtime starts right after the constructor, whose length doesn't depend on the offset.
+    code = constructor(len(constructor(0))) + runtime
+    return code + bytes.fromhex(borrower[2:]).rjust(32, b"\0") + threshold.to_bytes(32, "big")
+
+
+@pytest.fixture
+def w3():
+    return Web3(EthereumTesterProvider())
+
+
+@pytest.fixture
+def lender(w3):
+    account = Account.create()
+    w3.eth.send_transaction({"from": w3.eth.accounts[0], "to": account.address, "value": Web3.to_wei(100, "ether")})
+    return account
+
+
+@pytest.fixture
+def deploy(w3, lender):
+    """Deploy a funded loan contract from ``lender``; returns its checksum address."""
+    def deploy(borrower=None, threshold=THRESHOLD):
+        borrower = borrower or Account.create().address
+        tx = {"data": loan_initcode(borrower, threshold), "value": ESCROW, "gas": 300_000,
+              "gasPrice": w3.eth.gas_price, "nonce": w3.eth.get_transaction_count(lender.address),
+              "chainId": w3.eth.chain_id}
+        signed = lender.sign_transaction(tx)
+        tx_hash = w3.eth.send_raw_transaction(getattr(signed, "raw_transaction", None) or signed.rawTransaction)
+        return w3.eth.get_transaction_receipt(tx_hash)["contractAddress"]
+    return deploy
+
+
+def _camel(key):
+    head, *rest = key.split("_")
+    return head + "".join(word.title() for word in rest)
+
+
+def _wire(value):
+    """Re-encode a web3-formatted result the way a JSON-RPC node sends it: camelCase keys, hex quantities."""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if isinstance(value, Mapping):
+        return {_camel(key): _wire(item) for key, item in value.items()}
+    return [_wire(item) for item in value]
+
+
+class TesterClient:
+    """``ChainClient`` stand-in whose ``rpc_batch`` runs against eth-tester and answers in wire format."""
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self.abi = ABI
+        self.calls = []
+
+    def rpc_batch(self, calls):
+        results = []
+        for method, params in calls:
+            self.calls.append((method, params))
+            if method == "eth_call":  # eth-tester wants a funded sender; real nodes don't
+                params = [{"from": self.w3.eth.accounts[0], **params[0]}] + params[1:]
+            elif method == "eth_getLogs" and isinstance(params[0].get("address"), str):
+                # Same filter; web3's request formatting only accepts an address list here.
+                params = [{**params[0], "address": [params[0]["address"]]}]
+            result = _wire(self.w3.manager.request_blocking(method, params))
+            if method == "eth_getBlockByNumber" and result and params[1]:
+                # eth-tester names a transaction's calldata "data"; nodes call it "input".
+                result["transactions"] = [{"input": tx.pop("data"), **tx} for tx in result["transactions"]]
+            results.append(result)
+        return results
+
+
+@pytest.fixture
+def rpc_client(w3):
+    return TesterClient(w3)
+
+
+@pytest.fixture
+def mine(w3):
+    def mine(blocks=1):
+        w3.provider.ethereum_tester.mine_blocks(blocks)
+        return w3.eth.block_number
+    return mine
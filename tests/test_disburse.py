@@ -0,0 +1,87 @@
+import asyncio
+
+from eth_account import Account
+from web3 import Web3
+
+from conftest import ESCROW
+from disburse import DisbursementQueue, eligible_farms
+from sweep import sweep, web3_transport
+
+
+def _states(w3, contracts):
+    return asyncio.run(sweep(contracts, transport=web3_transport(w3)))["contracts"]
+
+
+def test_submit_assigns_consecutive_nonces_and_track_confirms(w3, lender, deploy):
+    borrowers = [Account.create().address for _ in range(3)]
+    farms = [{"farm_id": f"farm-{i}", "contract": deploy(borrower), "yield_prediction": 1600}
+             for i, borrower in enumerate(borrowers)]
+    first_nonce = w3.eth.get_transaction_count(lender.address)
+    queue = DisbursementQueue(w3, lender.key)
+
+    results = queue.submit(eligible_farms(farms, _states(w3, [f["contract"] for f in farms])))
+
+    assert [r["nonce"] for r in results] == [first_nonce, first_nonce + 1, first_nonce + 2]
+    assert all(r["status"] == "pending" for r in results)
+    results = asyncio.run(queue.track(results, poll_interval=0))
+    assert [r["status"] for r in results] == ["confirmed"] * 3
+    assert all(w3.eth.get_balance(borrower) == ESCROW for borrower in borrowers)
+    assert all(state["disbursed"] for state in _states(w3, [f["contract"] for f in farms]).values())
+
+
+def test_eligible_farms_skips_low_yield_and_disbursed(w3, lender, deploy):
+    low, done, ok = deploy(), deploy(), deploy()
+    queue = DisbursementQueue(w3, lender.key)
+    asyncio.run(queue.track(queue.submit([{"contract": done, "yield_prediction": 1500}]), poll_interval=0))
+    farms = [{"farm_id": "low", "contract": low, "yield_prediction": 1499},
+             {"farm_id": "done", "contract": done, "yield_prediction": 1600},
+             {"farm_id": "ok", "contract": ok, "yield_prediction": 1500},
+             {"farm_id": "no-code", "contract": Account.create().address, "yield_prediction": 1600}]
+
+    selected = eligible_farms(farms, _states(w3, [f["contract"] for f in farms]))
+
+    assert [f["farm_id"] for f in selected] == ["ok"]
+
+
+def test_track_reports_reverted_release(w3, lender, deploy):
+    queue = DisbursementQueue(w3, lender.key)
+    results = queue.submit([{"farm_id": "low", "contract": deploy(), "yield_prediction": 1000}])
+
+    results = asyncio.run(queue.track(results, poll_interval=0))
+
+    assert results[0]["status"] == "reverted"
+    assert results[0]["block"] == w3.eth.block_number
+
+
+def test_rejected_send_resyncs_nonce(w3, lender, deploy):
+    first, second = deploy(), deploy()
+    queue = DisbursementQueue(w3, lender.key)
+    queue.submit([{"farm_id": "first", "contract": first, "yield_prediction": 1600}])
+    # Another sender uses the lender key, so the queue's next local nonce is already taken.
+    w3.eth.send_raw_transaction(lender.sign_transaction({
+        "to": lender.address, "value": 0, "gas": 21_000, "gasPrice": w3.eth.gas_price,
+        "nonce": w3.eth.get_transaction_count(lender.address), "chainId": w3.eth.chain_id}).raw_transaction)
+
+    results = queue.submit([{"farm_id": "second", "contract": second, "yield_prediction": 1600}])
+
+    assert len(results) == 1 and results[0]["status"] == "pending"
+    assert results[0]["nonce"] == w3.eth.get_transaction_count(lender.address) - 1
+    assert asyncio.run(queue.track(results, poll_interval=0))[0]["status"] == "confirmed"
+
+
+def test_track_times_out_unknown_transaction(w3, lender):
+    queue = DisbursementQueue(w3, lender.key)
+    results = [{"farm_id": "lost", "tx_hash": "0x" + "00" * 32, "status": "pending"}]
+
+    assert asyncio.run(queue.track(results, poll_interval=0, timeout=0.05))[0]["status"] == "timeout"
+
+
+def test_send_error_is_reported_per_farm(w3, deploy):
+    broke = Account.create()  # no balance to pay for gas
+    queue = DisbursementQueue(w3, broke.key)
+
+    results = queue.submit([{"farm_id": "a", "contract": deploy(), "yield_prediction": 1600}])
+
+    assert results[0]["status"] == "send_error"
+    assert results[0]["nonce"] is None
+    assert Web3.is_checksum_address(results[0]["contract"])
@@ -0,0 +1,88 @@
+import json
+import sqlite3
+
+from disburse import DisbursementQueue
+from indexer import CONFIRMATIONS, Indexer, disbursements, indexed_state
+
+
+def _release(w3, lender, contract, actual_yield):
+    queue = DisbursementQueue(w3, lender.key)
+    result = queue.submit([{"farm_id": "farm", "contract": contract, "yield_prediction": actual_yield}])[0]
+    return w3.eth.get_transaction_receipt(result["tx_hash"])
+
+
+def _log_ranges(client):
+    return [(int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16))
+            for method, params in client.calls if method == "eth_getLogs"]
+
+
+def test_resumes_from_checkpoint_after_restart(w3, deploy, rpc_client, mine, tmp_path):
+    db_path = str(tmp_path / "index.sqlite")
+    contract = deploy()
+    start = w3.eth.block_number
+    indexer = Indexer(rpc_client, db_path)
+    indexer.add_contract(contract, start)
+    mine(5)
+    assert indexer.run_once() == 1
+    checkpoint = w3.eth.block_number - CONFIRMATIONS
+    indexer.db.close()
+
+    mine(4)
+    rpc_client.calls.clear()
+    restarted = Indexer(rpc_client, db_path)
+    restarted.add_contract(contract, start)  # already known: must not reset the checkpoint
+
+    assert restarted.run_once() == 1
+    assert _log_ranges(rpc_client) == [(checkpoint + 1, w3.eth.block_number - CONFIRMATIONS)]
+    assert indexed_state(contract, db_path)["block"] == w3.eth.block_number - CONFIRMATIONS
+
+
+def test_finds_exact_disbursement_block_and_yield(w3, lender, deploy, rpc_client, mine, tmp_path):
+    db_path = str(tmp_path / "index.sqlite")
+    contract = deploy()
+    indexer = Indexer(rpc_client, db_path)
+    indexer.add_contract(contract, w3.eth.block_number)
+    mine(7)
+    receipt = _release(w3, lender, contract, 1620)
+    mine(9)
+
+    indexer.run_once()
+
+    assert disbursements(db_path) == [{"address": contract, "block": receipt["blockNumber"],
+                                       "tx_hash": receipt["transactionHash"].to_0x_hex(), "actual_yield": 1620}]
+    assert indexed_state(contract, db_path)["disbursed"] is True
+
+
+def test_rolls_back_when_stored_block_hash_is_reorged(w3, deploy, rpc_client, mine, tmp_path):
+    db_path = str(tmp_path / "index.sqlite")
+    tester = w3.provider.ethereum_tester
+    contract = deploy()
+    indexer = Indexer(rpc_client, db_path)
+    indexer.add_contract(contract, w3.eth.block_number)
+    mine(5)
+    indexer.run_once()
+    kept = w3.eth.block_number - CONFIRMATIONS
+    snapshot = tester.take_snapshot()
+    mine(6)
+    indexer.run_once()
+    orphaned = w3.eth.block_number - CONFIRMATIONS
+
+    # Replace everything after the snapshot with a different branch of the same height.
+    tester.revert_to_snapshot(snapshot)
+    w3.eth.send_transaction({"from": w3.eth.accounts[0], "to": w3.eth.accounts[1], "value": 1})
+    mine(5)
+    assert w3.eth.block_number - CONFIRMATIONS == orphaned
+
+    assert indexer.check_reorg() == kept
+    assert indexed_state(contract, db_path) is None  # the only state row was read above the fork
+    with sqlite3.connect(db_path) as db:
+        assert db.execute("SELECT MAX(number) FROM blocks").fetchone()[0] == kept
+        assert db.execute("SELECT checkpoint FROM contracts").fetchone()[0] == kept
+
+    indexer.run_once()
+    with sqlite3.connect(db_path) as db:
+        stored = db.execute("SELECT hash FROM blocks WHERE number = ?", (orphaned,)).fetchone()[0]
+        state = json.loads(db.execute("SELECT state FROM contract_state").fetchone()[0])
+    assert stored == w3.eth.get_block(orphaned)["hash"].to_0x_hex()
+    assert state["disbursed"] is False
+    assert indexed_state(contract, db_path)["block"] == orphaned
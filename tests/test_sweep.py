@@ -0,0 +1,37 @@
+import asyncio
+
+from eth_account import Account
+
+from conftest import ESCROW, THRESHOLD
+from sweep import disbursement_summary, sweep, web3_transport
+
+
+def test_web3_transport_reads_every_contract_at_one_block(w3, lender, deploy):
+    borrower = Account.create().address
+    contracts = [deploy(borrower) for _ in range(3)]
+    missing = Account.create().address  # no code: every view call returns empty data
+
+    result = asyncio.run(sweep(contracts + [missing], transport=web3_transport(w3), batch_size=2))
+
+    assert result["block"] == w3.eth.block_number
+    for contract in contracts:
+        assert result["contracts"][contract] == {
+            "amount": ESCROW, "borrower": borrower, "disbursed": False, "getStatus": "Pending",
+            "lender": lender.address, "yieldThreshold": THRESHOLD}
+    assert "error" in result["contracts"][missing]
+    assert disbursement_summary(result) == {"block": result["block"], "contracts": 4, "disbursed": 0,
+                                            "pending": 3, "errors": 1}
+
+
+def test_rejected_batch_marks_every_contract():
+    contracts = ["0x" + f"{i:040x}" for i in range(1, 6)]
+
+    async def transport(payload):
+        if payload[0]["method"] == "eth_blockNumber":
+            return [{"jsonrpc": "2.0", "id": 0, "result": "0x10"}]
+        return [{"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch too large"}}]
+
+    result = asyncio.run(sweep(contracts, transport=transport))
+
+    assert all(state == {"error": "batch too large"} for state in result["contracts"].values())
+    assert disbursement_summary(result)["errors"] == 5